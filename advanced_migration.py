@@ -1,225 +1,274 @@
-
 import os
 import re
+import argparse
+import hashlib
 import pandas as pd
 import sqlite3
-from bs4 import BeautifulSoup
-from datetime import datetime
-from fuzzywuzzy import process, fuzz
-from openpyxl import load_workbook
-import unidecode
+from datetime import datetime, timedelta
+from client_identity import new_identity_index, load_identity_index, resolve_client_id
+from derived_tables import drop_triggers
+from monthly_totals import AGGREGATE_TRIGGERS, ensure_aggregates
+from notion_enrichment import DETAILS_TABLE, build_notion_index, enrich, ensure_details_table, has_notion_keys, mark_used, new_stats, notion_details, print_stats
+from notion_parser import NOTION_PARSER_VERSION, iter_notion_files, parse_notion_files
+from parse_cache import file_digest
+from transaction_dates import ensure_date_index, epoch_ms, normalize_dates
+from transaction_search import TEXT_TRIGGERS, ensure_text_index
+from transaction_dedup import dedupe_rows, ensure_natural_key_index, load_natural_keys
+from treinta_parser import PARSER_VERSION, parse_treinta_excel_cached
 
 # Configuration
 DATA_DIR = r'C:\Users\Power\Desktop\datos_migracion'
 DB_PATH = 'prisma/dev.db'
 
-def normalize_name(name):
-    if not name: return ""
-    name = re.sub(r'\s*\(.*?\)', '', str(name))
-    try:
-        norm = unidecode.unidecode(name).lower().strip()
-    except:
-        norm = str(name).lower().strip()
-    return norm
+LOAD_TABLES = ('Client', 'InventoryAccount', 'SalesProfile', 'Transaction')
+VALIDITY = timedelta(days=30)
+MANIFEST_TABLE = '_migration_sources'
+MIGRATION_EMAIL = 'migracion@estratosfera.net' # placeholder account behind each PERFIL_<service>
+# Rules the loaded rows were produced with; a manifest entry with another
+# version is reloaded like a changed file. source_version() adds the Notion
+# pages themselves, so editing, adding or removing one re-enriches everything.
+SOURCE_VERSION = f"treinta-v{PARSER_VERSION} notion-v{NOTION_PARSER_VERSION}"
 
-def detect_service(desc):
-    desc = str(desc).lower()
-    if 'netflix' in desc or 'nfx' in desc: return 'NETFLIX'
-    if 'disney' in desc: return 'DISNEY+'
-    if 'prime' in desc: return 'PRIME VIDEO'
-    if 'hbo' in desc or 'max' in desc: return 'HBO MAX'
-    if 'plex' in desc: return 'PLEX'
-    if 'iptv' in desc or 'magis' in desc: return 'IPTV'
-    if 'combo' in desc: return 'COMBO'
-    if 'spotify' in desc: return 'SPOTIFY'
-    if 'youtube' in desc: return 'YOUTUBE'
-    if 'start' in desc or 'star' in desc: return 'STAR+'
-    if 'paramount' in desc: return 'PARAMOUNT+'
-    if 'crunchyroll' in desc: return 'CRUNCHYROLL'
-    return 'GENERICO'
+def source_version(notion_paths, data_dir):
+    # SOURCE_VERSION + one digest over every Notion page (relative path, sha256)
+    h = hashlib.sha256()
+    for path in notion_paths:
+        rel_path = os.path.relpath(path, data_dir).replace(os.sep, '/')
+        h.update(f"{rel_path}\0{file_digest(path)}\n".encode('utf-8'))
+    return f"{SOURCE_VERSION} pages-{h.hexdigest()[:16]}"
 
-def parse_treinta_excel(file_path, year):
-    transactions = []
-    try:
-        wb = load_workbook(file_path, read_only=True, data_only=True)
-        sheet_names = wb.sheetnames
-        print(f"   -> Found {len(sheet_names)} sheets in {os.path.basename(file_path)}")
+def natural_key(identity, tx):
+    # (clienteId, fecha_inicio, monto) a TreintaRecord is stored under, None if undated
+    if pd.isna(tx.date):
+        return None
+    return resolve_client_id(identity, tx.client), epoch_ms(tx.date), tx.amount
+
+# batches['transactions'] rows are the "Transaction" columns followed by the
+# Notion details (notion key, email, screens) or None
+TRANSACTION_COLUMNS = 9
+
+def new_profile(batches, service_name, now_ts):
+    # One placeholder InventoryAccount + PERFIL_<service> SalesProfile pair, -> profile id
+    account_id = batches['next_account_id']
+    profile_id = batches['next_profile_id']
+    batches['accounts'].append((account_id, service_name, MIGRATION_EMAIL, now_ts, now_ts))
+    batches['profiles'].append((profile_id, f"PERFIL_{service_name}", account_id, now_ts, now_ts))
+    batches['next_account_id'] += 1
+    batches['next_profile_id'] += 1
+    return profile_id
+
+def build_batches(txs, batches, now_ts):
+    # Accumulates deduplicated rows for bulk_load from (TreintaRecord,
+    # NotionRecord or None, notion key) triples. `batches` carries the
+    # service -> profile map and the next ids across files.
+    service_map = batches['service_map']
+    clients = batches['clients']
+    
+    for tx, notion, notion_key in txs:
+        service_name = tx.service
+        
+        if service_name not in service_map:
+            service_map[service_name] = new_profile(batches, service_name, now_ts)
+        
+        profile_id = service_map[service_name]
         
-        last_valid_col_map = None
+        # Notion knows the actual account (email) and the screens sold, the
+        # original line ("1 net 12k nequi Cindy Cabarca (1p) ...") is kept too
+        description = notion.description if notion is not None else None
         
-        for idx, sheet_name in enumerate(sheet_names):
-             if idx % 200 == 0:
-                print(f"      Scanning sheet {idx}/{len(sheet_names)}...", end='\r', flush=True)
+        client_name = tx.client
+        dummy_phone = resolve_client_id(batches['identity'], client_name)
+        
+        # First name seen wins, like the old INSERT OR IGNORE
+        if dummy_phone not in clients:
+            clients[dummy_phone] = (dummy_phone, client_name, now_ts, now_ts)
+        
+        start_date = tx.date
+        if pd.isna(start_date): continue
+        
+        s_ts = epoch_ms(start_date)
+        e_ts = epoch_ms(start_date + VALIDITY)
+        
+        batches['transactions'].append((dummy_phone, profile_id, 'PAGADO', s_ts, e_ts, tx.amount, description, now_ts, now_ts, notion_details(notion, notion_key)))
 
-             try:
-                ws = wb[sheet_name]
-                rows_iter = ws.iter_rows(values_only=True)
-                
-                rows_buffer = []
-                header_row_idx = None
-                
-                # Buffer first few rows to sniff header
-                for i in range(20):
-                    try:
-                        row = next(rows_iter)
-                        rows_buffer.append(row)
-                        row_str = " ".join([str(x) for x in row if x is not None])
-                        if "Fecha" in row_str and "Tipo" in row_str:
-                            header_row_idx = i
-                            break
-                    except StopIteration:
-                        break
-                
-                col_map = {}
-                data_rows_source = [] 
-                
-                if header_row_idx is not None:
-                     # 1. FOUND HEADER -> New Map
-                     header = rows_buffer[header_row_idx]
-                     for c_idx, val in enumerate(header):
-                         val_str = str(val).lower() if val else ""
-                         if "fecha" in val_str: col_map['date'] = c_idx
-                         elif "contacto" in val_str or "cliente" in val_str: col_map['client'] = c_idx # Prefer Contacto/Cliente
-                         elif "valor" in val_str or "monto" in val_str: col_map['amount'] = c_idx
-                         elif "tipo" in val_str: col_map['type'] = c_idx
-                         elif "descripci" in val_str: col_map['desc'] = c_idx
-                         # NOTE: explicitly ignoring "vendedor" to avoid capturing seller name
-                     
-                     if 'date' in col_map and 'amount' in col_map:
-                         last_valid_col_map = col_map
-                         data_rows_source = rows_buffer[header_row_idx+1:]
-                         
-                elif last_valid_col_map is not None:
-                     # 2. NO HEADER -> Inherit Map
-                     if rows_buffer:
-                         col_map = last_valid_col_map
-                         data_rows_source = rows_buffer
-                
-                if 'date' in col_map and 'amount' in col_map:
-                     
-                     def chain_rows():
-                         for r in data_rows_source: yield r
-                         for r in rows_iter: yield r
-                     
-                     for row in chain_rows():
-                         try:
-                             # 1. OPTIMISTIC: Standard Column Extraction
-                             date_val = None
-                             amount = 0
-                             tx_type = "Venta"
-                             client = "Unknown"
-                             desc = "GENERICO"
-                             
-                             valid_standard = False
-                             try:
-                                 if 'date' in col_map and 'amount' in col_map:
-                                     date_raw = row[col_map['date']]
-                                     amount_raw = row[col_map['amount']]
-                                     
-                                     if isinstance(date_raw, (datetime, pd.Timestamp)):
-                                         date_val = date_raw
-                                         valid_standard = True
-                                     elif isinstance(date_raw, str):
-                                          try:
-                                              date_val = pd.to_datetime(date_raw, dayfirst=True)
-                                              valid_standard = True
-                                          except: pass
-                                     
-                                     if valid_standard:
-                                         try:
-                                             amount = float(amount_raw)
-                                             client = row[col_map.get('client', 2)]
-                                             tx_type = row[col_map.get('type', -1)] if 'type' in col_map else "Venta"
-                                             desc = row[col_map.get('desc', -1)] if 'desc' in col_map else ""
-                                             
-                                             row_str_chk = " ".join([str(x) for x in row if x is not None]).lower()
-                                             if "gasto" in row_str_chk or "egreso" in row_str_chk or "compra" in row_str_chk:
-                                                 tx_type = "Gasto"
-                                             
-                                             if "anulado" in row_str_chk or "anulada" in row_str_chk:
-                                                 continue
-                                         except:
-                                             valid_standard = False
-                             except:
-                                 valid_standard = False
+def new_batches():
+    return {
+        'service_map': {},
+        'next_account_id': 1000,
+        'next_profile_id': 1000,
+        'accounts': [],
+        'profiles': [],
+        'clients': {},
+        'transactions': [],
+        'identity': new_identity_index(),
+        # (source path, sha256, start, end) slices of `transactions` per file
+        'sources': [],
+        'version': SOURCE_VERSION,
+    }
 
-                             # 2. FALLBACK: Regex on JOINT ROW
-                             val_str_full = " ".join([str(x) for x in row if x is not None])
-                             
-                             regex_match = re.search(r'(?:(\d{2}/\d{2}/\d{4})|(\d{4}-\d{2}-\d{2}))\s+(?:(?:\S+)\s+)?(.*?)\s+(\d+(?:\.\d+)?)\s*$', val_str_full)
-                             
-                             if regex_match and (not valid_standard or amount == 0):
-                                 d_str = regex_match.group(1) if regex_match.group(1) else regex_match.group(2)
-                                 date_val = pd.to_datetime(d_str, dayfirst=(regex_match.group(1) is not None))
-                                 
-                                 client = regex_match.group(3).strip()
-                                 amount = float(regex_match.group(4))
-                                 tx_type = "Venta"
-                                 desc = val_str_full # Use full row as description for fallback
-                                 
-                                 if "gasto" in val_str_full.lower() or "egreso" in val_str_full.lower() or "compra" in val_str_full.lower(): 
-                                     tx_type = "Gasto"
-                                 
-                                 if "anulado" in val_str_full.lower() or "anulada" in val_str_full.lower():
-                                     continue
+def ensure_manifest(cursor):
+    # One row per loaded source file. Transactions of a file are inserted with
+    # a single executemany, so their ids form the contiguous [first_tx_id,
+    # last_tx_id] range that is deleted when the file changes, disappears or
+    # was loaded with other parser rules (parser_version).
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS "{MANIFEST_TABLE}" (
+            "path" TEXT NOT NULL PRIMARY KEY,
+            "sha256" TEXT NOT NULL,
+            "parser_version" TEXT,
+            "row_count" INTEGER NOT NULL,
+            "first_tx_id" INTEGER,
+            "last_tx_id" INTEGER,
+            "loadedAt" INTEGER NOT NULL
+        )
+    ''')
+    # Manifests written before parser_version existed: NULL never matches, so
+    # those files are reloaded once
+    cursor.execute(f'PRAGMA table_info("{MANIFEST_TABLE}")')
+    if 'parser_version' not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f'ALTER TABLE "{MANIFEST_TABLE}" ADD COLUMN "parser_version" TEXT')
 
-                                 valid_standard = True
+def load_manifest(cursor):
+    ensure_manifest(cursor)
+    cursor.execute(f'SELECT path, sha256, parser_version, row_count, first_tx_id, last_tx_id FROM "{MANIFEST_TABLE}"')
+    return {row[0]: row[1:] for row in cursor.fetchall()}
 
-                             if not valid_standard or pd.isna(date_val): continue
-                             
-                             # Handle Expenses
-                             if str(tx_type).lower() == 'gasto':
-                                 amount = -abs(amount)
-                             
-                             if abs(amount) > 100000000: continue
-                             if amount == 0: continue
-                             
-                             # SERVICE DETECTION
-                             service_detected = detect_service(desc if desc else val_str_full)
-                             if service_detected == 'GENERICO':
-                                 # Try detecting from full row if desc was empty
-                                 service_detected = detect_service(val_str_full)
+def count_notion_accounts(cursor):
+    cursor.execute("SELECT COUNT(*) FROM InventoryAccount WHERE id >= 1000 AND email != ?", (MIGRATION_EMAIL,))
+    return cursor.fetchone()[0]
 
-                             transactions.append({
-                                'source': 'Treinta',
-                                'year': year,
-                                'date': date_val,
-                                'price': amount,
-                                'client_name': str(client) if client else 'Unknown',
-                                'service': service_detected,
-                                'is_renewal': True
-                            })
-                         except Exception:
-                             continue
-             except Exception:
-                 pass
-        
-        wb.close()
-        return transactions
-    except Exception as e:
-        print(f"⚠️ Error reading Excel {file_path}: {e}")
-        return []
+def stale_ranges(stale):
+    # -> [(first_tx_id, last_tx_id)] that bulk_load will roll back
+    return [(first_id, last_id) for _, _, _, first_id, last_id in stale.values() if first_id is not None]
 
-def migrate():
-    print("Starting HIERARCHICAL Migration (Treinta ONLY)...")
-    conn = sqlite3.connect(DB_PATH)
+def kept_notion_keys(cursor, stale):
+    # Notion records held by transactions that survive rolling back `stale`
+    ensure_details_table(cursor)
+    ranges = stale_ranges(stale)
+    cursor.execute(f'SELECT transaction_id, notion_key FROM "{DETAILS_TABLE}" WHERE notion_key IS NOT NULL')
+    return {key for tx_id, key in cursor.fetchall() if not any(first <= tx_id <= last for first, last in ranges)}
+
+def load_existing_batches(cursor):
+    # Incremental runs continue from what is already in the database: the
+    # migration accounts/profiles (ids >= 1000) and the client identities.
+    batches = new_batches()
+    cursor.execute('''
+        SELECT a.servicio, p.id FROM SalesProfile p
+        JOIN InventoryAccount a ON a.id = p.accountId
+        WHERE p.id >= 1000 AND a.email = ? ORDER BY p.id
+    ''', (MIGRATION_EMAIL,))
+    for service_name, profile_id in cursor.fetchall():
+        batches['service_map'].setdefault(service_name, profile_id)
+    cursor.execute("SELECT COALESCE(MAX(id) + 1, 1000) FROM InventoryAccount WHERE id >= 1000")
+    batches['next_account_id'] = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(id) + 1, 1000) FROM SalesProfile WHERE id >= 1000")
+    batches['next_profile_id'] = cursor.fetchone()[0]
+    batches['identity'] = load_identity_index(cursor)
+    return batches
+
+def drop_secondary_indexes(cursor):
+    # Returns the CREATE statements so the indexes can be rebuilt after the load
+    placeholders = ','.join('?' for _ in LOAD_TABLES)
+    cursor.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})", LOAD_TABLES)
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+def bulk_load(conn, batches, stale=None, now_ts=None):
+    # stale=None -> full reload (wipe everything first). Otherwise only the
+    # manifest entries in `stale` (changed or deleted files) are rolled back.
     cursor = conn.cursor()
+    now_ts = now_ts or int(datetime.now().timestamp() * 1000)
     
-    print("Clearing database...")
-    cursor.execute("DELETE FROM 'Transaction'")
-    cursor.execute("DELETE FROM Client")
-    cursor.execute("DELETE FROM SalesProfile WHERE id >= 999")
-    cursor.execute("DELETE FROM InventoryAccount WHERE id >= 999")
-    conn.commit()
-
-    service_map = {}
-    next_account_id = 1000
-    next_profile_id = 1000
+    # Load-time settings: no fsync and an in-memory rollback journal. Safe
+    # because the whole load is one transaction over a disposable dev.db.
+    cursor.execute("PRAGMA journal_mode = MEMORY")
+    cursor.execute("PRAGMA synchronous = OFF")
     
-    # TREINTA PASS
-    print("\n--- PASS 1: PROCESSING TREINTA FILES (Primary Source) ---")
-    for root, dirs, files in os.walk(DATA_DIR):
-        for file in files:
+    cursor.execute("BEGIN")
+    try:
+        ensure_manifest(cursor)
+        ensure_aggregates(cursor)
+        ensure_text_index(cursor)
+        ensure_details_table(cursor)
+        if stale is None:
+            # Derived tables are refilled once at the end instead of row by row
+            drop_triggers(cursor, AGGREGATE_TRIGGERS)
+            drop_triggers(cursor, TEXT_TRIGGERS)
+            print("Clearing database...")
+            cursor.execute("DELETE FROM 'Transaction'")
+            cursor.execute("DELETE FROM Client")
+            cursor.execute("DELETE FROM SalesProfile WHERE id >= 999")
+            cursor.execute("DELETE FROM InventoryAccount WHERE id >= 999")
+            cursor.execute(f'DELETE FROM "{MANIFEST_TABLE}"')
+            cursor.execute(f'DELETE FROM "{DETAILS_TABLE}"')
+        else:
+            touched = set()
+            for path, (_, _, row_count, first_id, last_id) in stale.items():
+                print(f"Rolling back {row_count} transactions from {path}")
+                if first_id is not None:
+                    cursor.execute("SELECT DISTINCT clienteId FROM 'Transaction' WHERE id BETWEEN ? AND ?", (first_id, last_id))
+                    touched.update(row[0] for row in cursor.fetchall())
+                    cursor.execute("DELETE FROM 'Transaction' WHERE id BETWEEN ? AND ?", (first_id, last_id))
+                cursor.execute(f'DELETE FROM "{MANIFEST_TABLE}" WHERE path = ?', (path,))
+            # Clients of the rolled-back rows that nothing references any more
+            cursor.executemany('''
+                DELETE FROM Client WHERE celular = ?
+                AND NOT EXISTS (SELECT 1 FROM "Transaction" WHERE clienteId = Client.celular)
+            ''', [(cid,) for cid in touched])
+            if touched and cursor.rowcount > 0:
+                print(f"Removed {cursor.rowcount} clients no transaction references any more")
+            # Rows the app or older scripts stored as text dates
+            fixed, bad = normalize_dates(cursor)
+            if fixed or bad:
+                print(f"Normalized {fixed} text dates to epoch ms ({len(bad)} unparseable)")
+        
+        index_sql = drop_secondary_indexes(cursor)
+        
+        print(f"Loading {len(batches['clients'])} clients, {len(batches['accounts'])} accounts, {len(batches['transactions'])} transactions...")
+        cursor.executemany('INSERT INTO InventoryAccount (id, servicio, tipo, email, password, createdAt, updatedAt) VALUES (?, ?, "ESTATICO", ?, "123", ?, ?)', batches['accounts'])
+        cursor.executemany('INSERT INTO SalesProfile (id, nombre_perfil, accountId, estado, createdAt, updatedAt) VALUES (?, ?, ?, "OCUPADO", ?, ?)', batches['profiles'])
+        cursor.executemany('INSERT OR IGNORE INTO Client (celular, nombre, createdAt, updatedAt) VALUES (?, ?, ?, ?)', batches['clients'].values())
+        
+        # Rows arrive deduplicated against the table (migrate)
+        for path, digest, start, end in batches['sources']:
+            rows = batches['transactions'][start:end]
+            first_id = last_id = None
+            if rows:
+                cursor.executemany('''
+                    INSERT INTO "Transaction" (clienteId, perfilId, estado_pago, fecha_inicio, fecha_vencimiento, monto, descripcion, createdAt, updatedAt)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [row[:TRANSACTION_COLUMNS] for row in rows])
+                cursor.execute("SELECT MAX(id) FROM 'Transaction'")
+                last_id = cursor.fetchone()[0]
+                first_id = last_id - len(rows) + 1
+                cursor.executemany(f'INSERT INTO "{DETAILS_TABLE}" (transaction_id, notion_key, email, screens) VALUES (?, ?, ?, ?)',
+                                   [(first_id + i, *row[TRANSACTION_COLUMNS]) for i, row in enumerate(rows) if row[TRANSACTION_COLUMNS]])
+            cursor.execute(f'INSERT INTO "{MANIFEST_TABLE}" (path, sha256, parser_version, row_count, first_tx_id, last_tx_id, loadedAt) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                           (path, digest, batches['version'], len(rows), first_id, last_id, now_ts))
+        
+        for sql in index_sql:
+            cursor.execute(sql)
+        ensure_natural_key_index(cursor)
+        ensure_date_index(cursor)
+        ensure_aggregates(cursor)
+        ensure_text_index(cursor)
+        
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    finally:
+        cursor.execute("PRAGMA synchronous = FULL")
+        cursor.execute("PRAGMA journal_mode = DELETE")
+
+def iter_source_files(data_dir=None):
+    data_dir = data_dir or DATA_DIR
+    for root, dirs, files in os.walk(data_dir):
+        # Fixed walk order: the first name seen keeps a colliding client ID
+        dirs.sort()
+        for file in sorted(files):
             if file.endswith('.xlsx') or file.endswith('.xls'):
                 path = os.path.join(root, file)
                 try:
@@ -227,45 +276,109 @@ def migrate():
                 except:
                     match = re.search(r'20\d{2}', file)
                     year = int(match.group(0)) if match else 2024
-                
-                print(f"Scanning Treinta: {file} ({year})")
-                txs = parse_treinta_excel(path, year)
-                
-                for tx in txs:
-                    service_name = tx['service']
-                    
-                    if service_name not in service_map:
-                        now_ts = int(datetime.now().timestamp() * 1000)
-                        cursor.execute('INSERT INTO InventoryAccount (id, servicio, tipo, email, password, createdAt, updatedAt) VALUES (?, ?, "ESTATICO", "migracion@estratosfera.net", "123", ?, ?)', (next_account_id, service_name, now_ts, now_ts))
-                        cursor.execute('INSERT INTO SalesProfile (id, nombre_perfil, accountId, estado, createdAt, updatedAt) VALUES (?, ?, ?, "OCUPADO", ?, ?)', (next_profile_id, f"PERFIL_{service_name}", next_account_id, now_ts, now_ts))
-                        service_map[service_name] = next_profile_id
-                        next_account_id += 1
-                        next_profile_id += 1
-                    
-                    profile_id = service_map[service_name]
-                    client_name = tx['client_name']
-                    norm_name = normalize_name(client_name)
-                    dummy_phone = str(abs(hash(norm_name)))[:10]
-                    
-                    now_ts = int(datetime.now().timestamp() * 1000)
-                    cursor.execute('INSERT OR IGNORE INTO Client (celular, nombre, createdAt, updatedAt) VALUES (?, ?, ?, ?)', (dummy_phone, client_name, now_ts, now_ts))
-                    
-                    start_date = tx['date']
-                    if pd.isna(start_date): continue
-                    
-                    s_ts = int(start_date.timestamp() * 1000)
-                    end_date = start_date + pd.Timedelta(days=30)
-                    e_ts = int(end_date.timestamp() * 1000)
-                    
-                    cursor.execute('''
-                        INSERT INTO "Transaction" (clienteId, perfilId, estado_pago, fecha_inicio, fecha_vencimiento, monto, createdAt, updatedAt)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (dummy_phone, profile_id, 'PAGADO', s_ts, e_ts, tx['price'], now_ts, now_ts))
-                
-                conn.commit()
+                yield path, os.path.relpath(path, data_dir).replace(os.sep, '/'), year
 
-    conn.close()
+def migrate(incremental=False):
+    print(f"Starting HIERARCHICAL Migration (Treinta + Notion, {'incremental' if incremental else 'full'})...")
+    
+    now_ts = int(datetime.now().timestamp() * 1000)
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        cursor = conn.cursor()
+        manifest = load_manifest(cursor)
+        stale = None
+        
+        if incremental:
+            cursor.execute("SELECT COUNT(*) FROM 'Transaction'")
+            if not manifest and cursor.fetchone()[0] > 0:
+                # Loaded before the manifest existed: row ranges are unknown
+                print("No source manifest yet, falling back to a full reload.")
+                incremental = False
+            elif count_notion_accounts(cursor):
+                # Older loads made an InventoryAccount per Notion email
+                print("Notion accounts from an older load found, falling back to a full reload.")
+                incremental = False
+            elif not has_notion_keys(cursor):
+                # Their Notion matches can't be told apart from free records
+                print("Notion matches from an older load have no record keys, falling back to a full reload.")
+                incremental = False
+        
+        batches = load_existing_batches(cursor) if incremental else new_batches()
+        if incremental:
+            stale = {}
+        
+        # NOTION PASS
+        print("\n--- PASS 1: INDEXING NOTION PAGES (service, account, screens) ---")
+        notion_paths = list(iter_notion_files(DATA_DIR))
+        batches['version'] = source_version(notion_paths, DATA_DIR)
+        notion_files = parse_notion_files(notion_paths)
+        notion_index = build_notion_index(
+            (f"{os.path.relpath(path, DATA_DIR).replace(os.sep, '/')}:{pos}", r)
+            for path, records in notion_files for pos, r in enumerate(records))
+        notion_stats = new_stats()
+        print(f"Indexed {len(notion_index['records'])} Notion records from {len(notion_files)} pages")
+        
+        # TREINTA PASS
+        print("\n--- PASS 2: PROCESSING TREINTA FILES (Primary Source) ---")
+        seen = set()
+        parsed = []
+        for path, rel_path, year in iter_source_files():
+            seen.add(rel_path)
+            digest = file_digest(path)
+            
+            if incremental and rel_path in manifest and manifest[rel_path][:2] == (digest, batches['version']):
+                continue
+            
+            print(f"Scanning Treinta: {rel_path} ({year})")
+            try:
+                txs = parse_treinta_excel_cached(path)
+            except Exception as e:
+                # Left out of the manifest (and its old rows, if any, kept), so
+                # the next --incremental run retries it
+                print(f"⚠️ Error reading Excel {rel_path}: {e}, skipped")
+                continue
+            if incremental and rel_path in manifest:
+                stale[rel_path] = manifest[rel_path]
+            parsed.append((rel_path, digest, txs))
+        
+        if incremental:
+            for rel_path in manifest.keys() - seen:
+                stale[rel_path] = manifest[rel_path]
+            if not stale and not parsed:
+                print("All source files unchanged, nothing to load.")
+                return
+            # Matched in an earlier run and kept: not available to the new rows
+            mark_used(notion_index, kept_notion_keys(cursor, stale))
+        
+        # Duplicates go before the Notion pass, a dropped copy must not use up
+        # a record. Keys of the rows that stay count as seen.
+        natural_keys = load_natural_keys(cursor, stale_ranges(stale)) if incremental else set()
+        duplicates = 0
+        for rel_path, digest, txs in parsed:
+            txs, dropped = dedupe_rows(txs, natural_keys, lambda tx: natural_key(batches['identity'], tx))
+            duplicates += dropped
+            start = len(batches['transactions'])
+            build_batches(enrich(notion_index, txs, notion_stats, rel_path), batches, now_ts)
+            batches['sources'].append((rel_path, digest, start, len(batches['transactions'])))
+        if duplicates:
+            print(f"Skipped {duplicates} duplicate transactions (same client, date and amount)")
+        
+        print_stats(notion_index, notion_stats)
+        
+        if batches['identity']['collisions']:
+            print(f"⚠️ {len(batches['identity']['collisions'])} client ID collisions resolved by probing:")
+            for norm, owner, cid in batches['identity']['collisions']:
+                print(f"   {norm!r} vs {owner!r} on {cid}")
+        
+        # LOAD PASS
+        print("\n--- PASS 3: BULK LOAD ---")
+        bulk_load(conn, batches, stale, now_ts)
+    finally:
+        conn.close()
     print("Migration Complete!")
 
 if __name__ == '__main__':
-    migrate()
+    parser = argparse.ArgumentParser(description="Load the Treinta exports under DATA_DIR into prisma/dev.db")
+    parser.add_argument('--incremental', action='store_true', help="only load new or changed files (see the _migration_sources manifest)")
+    args = parser.parse_args()
+    migrate(incremental=args.incremental)
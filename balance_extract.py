@@ -0,0 +1,72 @@
+import pandas as pd
+from date_normalizer import parse_dates
+
+# Column-oriented extraction of the 2025 balance-*.xlsx exports (Hoja1).
+# Layout: title block, header on row 14 (index 13), data below it:
+#   1 Fecha, 2 Tipo, 3 Vendedor, 4 Descripción, 5 Categoría de gasto,
+#   6 Contacto, 7 Estado, 8 M. de pago, 9 Valor
+# The data block is sliced once and every field is cleaned with whole-column
+# string/numeric ops, no per-row Python.
+
+BALANCE_SHEET = 'Hoja1'
+HEADER_ROW = 13
+DATE_COL, TYPE_COL, DESC_COL, CLIENT_COL, STATUS_COL, METHOD_COL, AMOUNT_COL = 1, 2, 4, 6, 7, 8, 9
+
+# First match wins
+METHOD_MAP = (
+    ('transferencia bancaria', 'BANCOLOMBIA'),
+    ('nequi', 'NEQUI'),
+    ('efectivo', 'EFECTIVO'),
+)
+RECORD_COLUMNS = ['date', 'type', 'client', 'description', 'method', 'amount', 'status']
+
+def read_balance_block(file_path):
+    df = pd.read_excel(file_path, sheet_name=BALANCE_SHEET, header=None)
+    return df.iloc[HEADER_ROW + 1:].reindex(columns=range(AMOUNT_COL + 1))
+
+def text_column(col, default):
+    return col.astype(str).str.strip().where(col.notna(), default)
+
+def clean_amounts(col):
+    # '$12,000' -> 12000.0; blank stays NaN, anything else unparseable is invalid
+    is_str = col.map(type) == str
+    stripped = col.astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False).str.strip()
+    amounts = pd.to_numeric(col.where(~is_str, stripped), errors='coerce').astype(float)
+    return amounts, amounts.isna() & col.notna()
+
+def map_methods(methods):
+    lower = methods.str.lower()
+    mapped = methods
+    for key, value in reversed(METHOD_MAP):
+        mapped = mapped.mask(lower.str.contains(key, regex=False), value)
+    return mapped
+
+def extract_balance(file_path, default_date=None):
+    # -> (records DataFrame in RECORD_COLUMNS order, raw amounts that failed to parse)
+    # Rows without a usable date are dropped unless default_date is given.
+    block = read_balance_block(file_path)
+
+    date_raw = block[DATE_COL]
+    block = block[date_raw.notna() & (date_raw.astype(str).str.strip() != '')]
+
+    amounts, invalid_amount = clean_amounts(block[AMOUNT_COL])
+    invalid = block.loc[invalid_amount, AMOUNT_COL]
+    block, amounts = block[~invalid_amount], amounts[~invalid_amount]
+
+    dates = parse_dates(block[DATE_COL]).dt.strftime('%Y-%m-%d')
+    if default_date is not None:
+        dates = dates.fillna(default_date)
+    else:
+        keep = dates.notna()
+        block, amounts, dates = block[keep], amounts[keep], dates[keep]
+
+    records = pd.DataFrame({
+        'date': dates,
+        'type': block[TYPE_COL].astype(str).str.strip(),
+        'client': text_column(block[CLIENT_COL], 'Cliente General'),
+        'description': text_column(block[DESC_COL], '-'),
+        'method': map_methods(text_column(block[METHOD_COL], 'EFECTIVO')),
+        'amount': amounts,
+        'status': text_column(block[STATUS_COL], 'Pagado'),
+    }, columns=RECORD_COLUMNS)
+    return records, invalid
@@ -1,40 +1,301 @@
-
+import os
+import sys
+import json
 import time
-import pandas as pd
-from openpyxl import load_workbook
-
-FILE_PATH = r'c:/Users/Power/Desktop/datos_migracion/DATOS/2024/a0c2bff7-95d3-4d30-900a-4e7f231383fa-05122501533.xlsx'
-
-def bench_pandas():
-    start = time.time()
-    try:
-        xl = pd.ExcelFile(FILE_PATH)
-        sheet_names = xl.sheet_names[:100] # Test 100 sheets
-        print(f"Pandas: Scanning {len(sheet_names)} sheets...")
-        for sheet in sheet_names:
-            df = pd.read_excel(FILE_PATH, sheet_name=sheet, header=None)
-    except Exception as e:
-        print(e)
-    end = time.time()
-    print(f"Pandas Time: {end - start:.2f}s")
-
-def bench_openpyxl():
-    start = time.time()
-    try:
-        wb = load_workbook(FILE_PATH, read_only=True)
-        sheet_names = wb.sheetnames[:100]
-        print(f"OpenPyXL: Scanning {len(sheet_names)} sheets...")
-        for sheet in sheet_names:
-            ws = wb[sheet]
-            # Just access first few rows
-            rows = []
-            for i, row in enumerate(ws.iter_rows(max_row=20, values_only=True)):
-                 rows.append(row)
-    except Exception as e:
-        print(e)
-    end = time.time()
-    print(f"OpenPyXL Time: {end - start:.2f}s")
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook, load_workbook
+from treinta_parser import sniff_header, build_col_map, has_money_columns, parse_rows
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from xlsx_reader import XlsxWorkbook
+except ImportError:
+    XlsxWorkbook = None
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Excel ingestion benchmark.
+#
+#   python bench_excel.py                        # every workbook under DATOS/
+#   python bench_excel.py DATOS/2024 -r openpyxl xml
+#   python bench_excel.py --synthetic            # generated Treinta + balance workbooks
+#   python bench_excel.py --save bench.json      # record a baseline
+#   python bench_excel.py --baseline bench.json  # flag rows/s regressions against it
+#
+# Every (reader, file) pair runs in a fresh process so peak RSS is its own.
+# Stages: open (workbook + sheet list), sniff (header search), decode (remaining
+# rows to tuples), normalize (treinta_parser.parse_rows) and db (executemany
+# into an in-memory SQLite table).
+
+DEFAULT_DATA_DIR = 'DATOS'
+STAGES = ('open', 'sniff', 'decode', 'normalize', 'db')
+REGRESSION_TOLERANCE = 0.15 # rows/s may drop this much before it is flagged
+
+SYNTHETIC_SHEETS = 1000
+SYNTHETIC_ROWS_PER_SHEET = 4
+SYNTHETIC_BALANCE_ROWS = 5000
+HEADER = ('Fecha', 'Tipo', 'Vendedor', 'Descripción', 'Categoría de gasto', 'Contacto', 'Estado', 'M. de pago', 'Valor')
+DESCRIPTIONS = ('1 Netflix 1 Pantalla', '1 Disney 1 Pantalla', 'Combo 5', '1 Prime Cuenta Completa', 'Spotify familiar', 'Compra de cuentas')
+
+# --- Readers -----------------------------------------------------------------
+# open_<reader>(path) -> (sheet_names, rows(sheet_name) -> iterator of tuples, close())
+
+def open_openpyxl(path):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    return wb.sheetnames, lambda name: wb[name].iter_rows(values_only=True), wb.close
+
+def open_pandas(path):
+    import pandas as pd
+    xl = pd.ExcelFile(path)
+    def rows(name):
+        df = xl.parse(name, header=None)
+        return (tuple(None if v != v else v for v in r) for r in df.itertuples(index=False, name=None))
+    return xl.sheet_names, rows, xl.close
+
+def open_calamine(path):
+    wb = CalamineWorkbook.from_path(path)
+    def rows(name):
+        return (tuple(None if v == '' else v for v in r) for r in wb.get_sheet_by_name(name).to_python(skip_empty_area=False))
+    return wb.sheet_names, rows, lambda: None
+
+def open_xml(path):
+    wb = XlsxWorkbook(path)
+    return wb.sheetnames, lambda name: wb[name].iter_rows(values_only=True), wb.close
+
+READERS = {
+    'openpyxl': open_openpyxl,
+    'pandas': open_pandas,
+    'calamine': open_calamine,
+    'xml': open_xml,
+}
+
+def available_readers():
+    missing = {'calamine': CalamineWorkbook is None, 'xml': XlsxWorkbook is None}
+    return [name for name in READERS if not missing.get(name)]
+
+# --- Synthetic workbooks -------------------------------------------------------
+
+def synthetic_row(i):
+    day = datetime(2024, 1, 1) + timedelta(days=i % 365)
+    desc = DESCRIPTIONS[i % len(DESCRIPTIONS)]
+    tx_type = 'Gasto' if desc.startswith('Compra') else 'Venta'
+    return (day.strftime('%d %b %Y'), tx_type, 'Vendedor', desc, 'No Aplica', f'Cliente {i % 700} Nfx', 'Pagada', 'Nequi', 5000 + (i % 20) * 1000)
+
+def make_treinta_workbook(path, sheets=SYNTHETIC_SHEETS, rows_per_sheet=SYNTHETIC_ROWS_PER_SHEET):
+    # PDF-converted layout: "Table N" sheets, header repeated on every 10th page
+    wb = Workbook(write_only=True)
+    n = 0
+    for s in range(sheets):
+        ws = wb.create_sheet(f'Table {s + 1}')
+        if s % 10 == 0:
+            ws.append(HEADER)
+        for _ in range(rows_per_sheet):
+            ws.append(synthetic_row(n))
+            n += 1
+    wb.save(path)
+
+def make_balance_workbook(path, rows=SYNTHETIC_BALANCE_ROWS):
+    # balance-*.xlsx layout: title block, header on row 14 starting at column B
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Hoja1')
+    ws.append([])
+    ws.append([None, 'Estratósfera Streaming '])
+    for _ in range(11):
+        ws.append([])
+    ws.append((None,) + HEADER)
+    for i in range(rows):
+        ws.append((None,) + synthetic_row(i))
+    wb.create_sheet('Hoja2')
+    wb.save(path)
+
+def synthetic_files(directory):
+    treinta = os.path.join(directory, 'synthetic-treinta.xlsx')
+    balance = os.path.join(directory, 'balance-synthetic.xlsx')
+    make_treinta_workbook(treinta)
+    make_balance_workbook(balance)
+    return [treinta, balance]
+
+# --- Measurement ---------------------------------------------------------------
+
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    return None
+
+def run_once(reader, path):
+    times = dict.fromkeys(STAGES, 0.0)
+    n_rows = 0
+    records = []
+
+    t = time.perf_counter()
+    sheet_names, rows, close = READERS[reader](path)
+    times['open'] = time.perf_counter() - t
+
+    # Same header inheritance as parse_treinta_excel
+    last_valid_col_map = None
+    for sheet_name in sheet_names:
+        t = time.perf_counter()
+        rows_iter = iter(rows(sheet_name))
+        rows_buffer, header_row_idx = sniff_header(rows_iter)
+        col_map = {}
+        data_rows = []
+        if header_row_idx is not None:
+            col_map = build_col_map(rows_buffer[header_row_idx])
+            if has_money_columns(col_map):
+                last_valid_col_map = col_map
+                data_rows = rows_buffer[header_row_idx + 1:]
+        elif last_valid_col_map is not None and rows_buffer:
+            col_map = last_valid_col_map
+            data_rows = rows_buffer
+        times['sniff'] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        rest = list(rows_iter)
+        times['decode'] += time.perf_counter() - t
+        n_rows += len(rows_buffer) + len(rest)
+        data_rows = data_rows + rest
+
+        t = time.perf_counter()
+        if has_money_columns(col_map):
+            parse_rows(data_rows, col_map, records)
+        times['normalize'] += time.perf_counter() - t
+    close()
+
+    t = time.perf_counter()
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE tx (fecha INTEGER, monto REAL, cliente TEXT, servicio TEXT, descripcion TEXT)')
+    conn.executemany('INSERT INTO tx VALUES (?, ?, ?, ?, ?)',
+                     ((int(r.date.timestamp() * 1000), r.amount, r.client, r.service, r.description) for r in records))
+    conn.commit()
+    conn.close()
+    times['db'] = time.perf_counter() - t
+
+    return times, n_rows, len(records)
+
+def bench_worker(reader, path, repeat):
+    best = None
+    for _ in range(repeat):
+        times, n_rows, n_records = run_once(reader, path)
+        if best is None or sum(times.values()) < sum(best.values()):
+            best = times
+    total = sum(best.values())
+    return {
+        'reader': reader,
+        'file': path,
+        'rows': n_rows,
+        'records': n_records,
+        'stages': best,
+        'total': total,
+        'rows_per_s': n_rows / total if total else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def bench(reader, path, repeat):
+    # maxtasksperchild=1 + spawn: a clean interpreter per measurement
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(bench_worker, (reader, path, repeat))
+
+def collect_files(paths):
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, dirs, names in os.walk(p):
+                dirs.sort()
+                files.extend(os.path.join(root, f) for f in sorted(names) if f.endswith('.xlsx') and not f.startswith('~$'))
+        else:
+            files.append(p)
+    return files
+
+def print_results(results):
+    print(f"\n{'reader':<9} {'file':<40} {'rows':>7} {'recs':>6} " + ' '.join(f'{s:>9}' for s in STAGES) + f" {'total':>8} {'rows/s':>9} {'RSS MB':>7}")
+    for r in results:
+        rss = f"{r['peak_rss_mb']:7.0f}" if r['peak_rss_mb'] is not None else f"{'?':>7}"
+        print(f"{r['reader']:<9} {os.path.basename(r['file'])[-40:]:<40} {r['rows']:>7} {r['records']:>6} "
+              + ' '.join(f"{r['stages'][s]:9.3f}" for s in STAGES)
+              + f" {r['total']:8.2f} {r['rows_per_s']:9.0f} {rss}")
+
+def compare_baseline(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(b['reader'], os.path.basename(b['file'])): b for b in json.load(f)}
+    regressions = 0
+    print(f"\nAgainst {baseline_path}:")
+    for r in results:
+        b = baseline.get((r['reader'], os.path.basename(r['file'])))
+        if not b or not b['rows_per_s']:
+            continue
+        change = r['rows_per_s'] / b['rows_per_s'] - 1
+        flag = ''
+        if change < -REGRESSION_TOLERANCE:
+            flag = '  <-- REGRESSION'
+            regressions += 1
+        if r['records'] != b['records']:
+            flag += f"  <-- records {b['records']} -> {r['records']}"
+            regressions += 1
+        print(f"  {r['reader']:<9} {os.path.basename(r['file'])[-40:]:<40} {change:+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Excel readers on Treinta exports")
+    parser.add_argument('paths', nargs='*', help=f"workbooks or directories (default: {DEFAULT_DATA_DIR}/)")
+    parser.add_argument('-r', '--readers', nargs='+', choices=list(READERS), help="readers to compare (default: all installed)")
+    parser.add_argument('--synthetic', action='store_true', help="benchmark generated Treinta and balance workbooks instead")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per measurement, the fastest is kept")
+    parser.add_argument('--save', help="write results as JSON")
+    parser.add_argument('--baseline', help="JSON from a previous --save, exits 1 on regressions")
+    args = parser.parse_args()
+
+    readers = args.readers or available_readers()
+    skipped = set(READERS) - set(available_readers())
+    if skipped and not args.readers:
+        print(f"Skipping readers that are not installed: {', '.join(sorted(skipped))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            print("Generating synthetic workbooks...")
+            files = synthetic_files(tmp)
+        else:
+            files = collect_files(args.paths or [DEFAULT_DATA_DIR])
+
+        results = []
+        for path in files:
+            for reader in readers:
+                print(f"{reader:<9} {path}", flush=True)
+                try:
+                    results.append(bench(reader, path, args.repeat))
+                except Exception as e:
+                    print(f"⚠️ {reader} failed on {path}: {e}")
+
+    print_results(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved {len(results)} results to {args.save}")
+
+    if args.baseline and compare_baseline(results, args.baseline):
+        sys.exit(1)
 
 if __name__ == '__main__':
-    bench_openpyxl()
-    # bench_pandas() # We know this is slow
+    main()
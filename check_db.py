@@ -1,4 +1,5 @@
 import sqlite3
+from monthly_totals import yearly_totals
 
 DB_PATH = 'prisma/dev.db'
 
@@ -10,8 +11,8 @@ def check_db():
     cursor.execute("SELECT COUNT(*) FROM Client")
     client_count = cursor.fetchone()[0]
     
-    cursor.execute("SELECT COUNT(*) FROM 'Transaction'")
-    tx_count = cursor.fetchone()[0]
+    totals = yearly_totals(cursor).values()
+    tx_count = sum(t[3] for t in totals)
     
     cursor.execute("SELECT COUNT(*) FROM InventoryAccount")
     account_count = cursor.fetchone()[0]
@@ -25,9 +26,8 @@ def check_db():
     print(f"Profiles: {profile_count}")
     
     # Check Sum
-    cursor.execute("SELECT SUM(monto) FROM 'Transaction'")
-    total_sales = cursor.fetchone()[0]
-    print(f"Total Sales (SQL): {total_sales}")
+    total_sales = sum(t[2] for t in totals)
+    print(f"Total Sales (monthly totals): {total_sales}")
     
     # Check a few transactions
     print("\nSample Transactions:")
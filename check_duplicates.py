@@ -1,51 +1,33 @@
-
+import argparse
 import sqlite3
+from transaction_dedup import delete_duplicates, duplicate_report
+
+# Duplicates on (Date, Client, Amount). advanced_migration.py already skips
+# them while loading; this reports (and with --delete removes) any that came in
+# some other way. Client is stored as ID (phone).
 
-def check_duplicates():
+def check_duplicates(delete=False):
     conn = sqlite3.connect('prisma/dev.db')
     cursor = conn.cursor()
     
-    # Check for duplicates based on Date, Client, Amount
-    # Note: Client is stored as ID (phone).
-    query = '''
-        SELECT 
-            fecha_inicio,
-            clienteId,
-            monto,
-            COUNT(*) as count
-        FROM 'Transaction'
-        GROUP BY fecha_inicio, clienteId, monto
-        HAVING count > 1
-        ORDER BY count DESC
-        LIMIT 20
-    '''
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    
-    total_duplicates = 0
-    if rows:
-        print(f"Found potential duplicates (Top 20):")
-        for r in rows:
+    top, groups, total_extra = duplicate_report(cursor)
+    if top:
+        print(f"Found potential duplicates (Top {len(top)} of {groups}):")
+        for r in top:
             print(f"  Date: {r[0]}, Client: {r[1]}, Amount: {r[2]} -> Count: {r[3]}")
-            total_duplicates += (r[3] - 1)
-        
-        # Get total count of extra rows
-        cursor.execute('''
-            SELECT SUM(count - 1)
-            FROM (
-                SELECT COUNT(*) as count
-                FROM 'Transaction'
-                GROUP BY fecha_inicio, clienteId, monto
-                HAVING count > 1
-            )
-        ''')
-        total_extra = cursor.fetchone()[0]
         print(f"\nTotal estimated duplicate rows to remove: {total_extra}")
+        
+        if delete:
+            print("Deduplicating transactions (keeping 1 per Date+Client+Amount)...")
+            print(f"Deleted {delete_duplicates(cursor)} duplicate rows.")
     else:
         print("No duplicates found based on (Date, Client, Amount).")
 
+    conn.commit()
     conn.close()
 
 if __name__ == '__main__':
-    check_duplicates()
+    parser = argparse.ArgumentParser(description="Report duplicate transactions in prisma/dev.db")
+    parser.add_argument('--delete', action='store_true', help="delete them, keeping the first one loaded")
+    args = parser.parse_args()
+    check_duplicates(delete=args.delete)
@@ -1,24 +1,12 @@
-
-import sqlite3
+from ledger_store import ensure_ledger, top_clients
 
 def check_top_clients():
-    conn = sqlite3.connect('prisma/dev.db')
-    cursor = conn.cursor()
+    # Reads the Parquet ledger (ledger_store.py), re-exported when dev.db has changed
+    ensure_ledger()
     
     print("Top 20 Clients by Transaction Count:")
-    cursor.execute("""
-        SELECT c.nombre, COUNT(*) as tx_count 
-        FROM "Transaction" t
-        JOIN Client c ON t.clienteId = c.celular
-        GROUP BY c.nombre
-        ORDER BY tx_count DESC
-        LIMIT 20
-    """)
-    rows = cursor.fetchall()
-    for r in rows:
-        print(f"{r[0]}: {r[1]}")
-        
-    conn.close()
+    for r in top_clients(20).itertuples(index=False):
+        print(f"{r.cliente}: {r.tx_count}")
 
 if __name__ == '__main__':
     check_top_clients()
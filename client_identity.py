@@ -0,0 +1,74 @@
+import re
+import hashlib
+import unicodedata
+import unidecode
+
+# Deterministic client identity shared by advanced_migration.py and
+# import_json.ts (src/lib/clientIdentity.ts implements the same rules, keep the
+# two in sync).
+#
+#   identity_name("Daniela García (2p)")  -> "daniela garcia"
+#   identity_name("Łukasz Ørsted")        -> "lukasz orsted"
+#   identity_name(" - ")                  -> "#-"
+#   client_id("daniela garcia")           -> int(md5(name), 16) % 10**10, 10 digits
+#
+# Letters NFKD can't decompose (ł, ø, ß, æ, ...) are transliterated, not
+# dropped. A name with nothing left to compare (only punctuation or tags)
+# keeps its own text behind UNNAMED, which no normalized name contains, so
+# "-" and "." stay two clients and never match a real name.
+#
+# Unlike hash(), md5 is stable across processes, so the same name gets the same
+# Client.celular on every run. Two different names can still land on the same
+# 10 digits; the index detects it and probes "name#1", "name#2", ... for the
+# newcomer, so the first owner of an ID keeps it.
+
+ID_DIGITS = 10
+PARENS = re.compile(r'\s*\(.*?\)')
+COMBINING = re.compile('[\u0300-\u036f]')
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+NON_ASCII_LETTER = re.compile(r'[^\W\d_a-zA-Z]') # symbols and digits are separators, as in TS
+UNNAMED = '#'
+
+def identity_name(name):
+    if not name: return ""
+    s = PARENS.sub('', str(name))
+    s = unicodedata.normalize('NFKD', s)
+    s = COMBINING.sub('', s)
+    s = NON_ASCII_LETTER.sub(lambda m: unidecode.unidecode(m.group()), s)
+    norm = NON_ALNUM.sub(' ', s.lower()).strip()
+    return norm or UNNAMED + ' '.join(str(name).split())
+
+def client_id(norm_name, attempt=0):
+    key = norm_name if attempt == 0 else f"{norm_name}#{attempt}"
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    return str(int(digest, 16) % 10 ** ID_DIGITS).zfill(ID_DIGITS)
+
+def new_identity_index():
+    return {'by_name': {}, 'by_id': {}, 'collisions': []}
+
+def load_identity_index(cursor):
+    # Existing clients keep their IDs, so re-imports upsert into the same rows
+    index = new_identity_index()
+    cursor.execute("SELECT celular, nombre FROM Client ORDER BY createdAt, celular")
+    for celular, nombre in cursor.fetchall():
+        norm = identity_name(nombre)
+        index['by_id'].setdefault(celular, norm)
+        index['by_name'].setdefault(norm, celular)
+    return index
+
+def resolve_client_id(index, name):
+    norm = identity_name(name)
+    cid = index['by_name'].get(norm)
+    if cid is not None:
+        return cid
+
+    attempt = 0
+    cid = client_id(norm)
+    while cid in index['by_id']:
+        index['collisions'].append((norm, index['by_id'][cid], cid))
+        attempt += 1
+        cid = client_id(norm, attempt)
+
+    index['by_name'][norm] = cid
+    index['by_id'][cid] = norm
+    return cid
@@ -0,0 +1,112 @@
+import re
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+# Fuzzy client-name matching for migration.py.
+#
+# Scores are the same as fuzzywuzzy's process.extractOne(query, names,
+# scorer=fuzz.token_sort_ratio) (python-Levenshtein backend): names are
+# processed like fuzzywuzzy's full_process (Latin-1 accents dropped, non-alphanumerics
+# to spaces, lowercased), tokens sorted, then scored with the Indel ratio and
+# rounded to an int. The contact list is processed once; a query only scores
+# the contacts that can still reach the threshold:
+#
+#   1. length block: ratio = 2*LCS/(n+m) > t  needs  min(n, m)/(n+m) > t/2
+#   2. bigram block: Levenshtein <= Indel distance D < (1-t)(n+m), and strings
+#      at edit distance k share >= max(n, m) - 1 - 2k bigrams (q-gram lemma)
+#
+# Both filters are lossless, so the best match above the threshold is the one
+# a full scan would return, ties included (first contact in list order wins).
+
+NON_ALNUM = re.compile(r'(?ui)\W')
+# fuzzywuzzy's force_ascii only strips Latin-1 (128-255), not all non-ASCII
+LATIN1 = dict.fromkeys(range(128, 256))
+
+def fuzz_key(name):
+    s = NON_ALNUM.sub(' ', str(name)).lower().strip()
+    s = s.translate(LATIN1)
+    s = NON_ALNUM.sub(' ', s).lower().strip()
+    return ' '.join(sorted(s.split())).strip()
+
+def bigrams(key):
+    return [key[i:i + 2] for i in range(len(key) - 1)]
+
+def build_match_index(names):
+    keys = [fuzz_key(n) for n in names]
+
+    vocab = {}
+    for key in keys:
+        for g in bigrams(key):
+            vocab.setdefault(g, len(vocab))
+
+    counts = np.zeros((len(keys), max(len(vocab), 1)), dtype=np.uint16)
+    for i, key in enumerate(keys):
+        for g in bigrams(key):
+            counts[i, vocab[g]] += 1
+
+    by_length = sorted(range(len(keys)), key=lambda i: len(keys[i]))
+    return {
+        'names': list(names),
+        'keys': keys,
+        'vocab': vocab,
+        'counts': counts,
+        'by_length': np.array(by_length, dtype=np.int64),
+        'sorted_lengths': [len(keys[i]) for i in by_length],
+        'cache': {},
+    }
+
+def candidates(index, key, threshold):
+    n = len(key)
+    t = threshold / 100.0
+    if n == 0:
+        # '' only ties with other empty keys (100), everything else scores 0
+        return index['by_length'][:bisect_right(index['sorted_lengths'], 0)]
+
+    # 1. Length block: m in (n*t/(2-t), n*(2-t)/t)
+    lo = bisect_right(index['sorted_lengths'], n * t / (2 - t))
+    hi = bisect_left(index['sorted_lengths'], n * (2 - t) / t) if t > 0 else len(index['sorted_lengths'])
+    cand = index['by_length'][lo:hi]
+    if len(cand) == 0:
+        return cand
+
+    # 2. Bigram block (only the query's own bigrams can be shared)
+    q_counts = {}
+    for g in bigrams(key):
+        if g in index['vocab']:
+            col = index['vocab'][g]
+            q_counts[col] = q_counts.get(col, 0) + 1
+
+    lengths = np.fromiter((len(index['keys'][i]) for i in cand), dtype=np.int64, count=len(cand))
+    max_dist = np.ceil((1 - t) * (n + lengths)) - 1
+    needed = np.maximum(n, lengths) - 1 - 2 * max_dist
+    if q_counts:
+        cols = np.fromiter(q_counts.keys(), dtype=np.int64)
+        q_vec = np.fromiter(q_counts.values(), dtype=np.uint16)
+        shared = np.minimum(index['counts'][cand][:, cols], q_vec).sum(axis=1)
+    else:
+        shared = np.zeros(len(cand), dtype=np.int64)
+    return cand[shared >= needed]
+
+def match_client(index, name, threshold=80):
+    # Returns (matched name, score) when score > threshold, else (None, score)
+    key = fuzz_key(name)
+    if key in index['cache']:
+        return index['cache'][key]
+
+    best_idx, best_score = None, 0
+    cand = np.sort(candidates(index, key, threshold))
+    if len(cand):
+        choices = [index['keys'][i] for i in cand]
+        # Batch-score the block in C; keep the first candidate (list order)
+        # with the highest rounded score, like fuzzywuzzy's max()
+        scores = process.cdist([key], choices, scorer=fuzz.ratio, processor=None)[0]
+        for pos, raw in enumerate(scores):
+            score = int(round(raw))
+            if score > best_score:
+                best_idx, best_score = int(cand[pos]), score
+
+    result = (index['names'][best_idx], best_score) if best_idx is not None and best_score > threshold else (None, best_score)
+    index['cache'][key] = result
+    return result
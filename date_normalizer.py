@@ -0,0 +1,111 @@
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+import pandas as pd
+from openpyxl.utils.datetime import from_excel
+
+# Date normalization for the Treinta and balance-*.xlsx exports.
+#
+#   parse_date("01 Nov 2025")   -> Timestamp('2025-11-01')
+#   parse_date("01 ene. 2025")  -> Timestamp('2025-01-01')  (Spanish months too)
+#   parse_date("29/06/2021")    -> Timestamp('2021-06-29')  (dayfirst)
+#   parse_date("2021-08-02 00:00:00"), parse_date(44197), parse_date(datetime(...))
+#
+# The shapes the exports actually use are matched by regex and built directly;
+# anything else goes through pd.to_datetime once and is memoized, so repeated
+# strings (every row of a day shares its date) cost a dict lookup.
+# Returns a Timestamp, NaT for blanks, or None when the value is not a date.
+# ISO strings are always year-month-day, even with dayfirst=True.
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'ene': 1, 'enero': 1,
+    'feb': 2, 'february': 2, 'febrero': 2,
+    'mar': 3, 'march': 3, 'marzo': 3,
+    'apr': 4, 'april': 4, 'abr': 4, 'abril': 4,
+    'may': 5, 'mayo': 5,
+    'jun': 6, 'june': 6, 'junio': 6,
+    'jul': 7, 'july': 7, 'julio': 7,
+    'aug': 8, 'august': 8, 'ago': 8, 'agosto': 8,
+    'sep': 9, 'sept': 9, 'september': 9, 'set': 9, 'septiembre': 9, 'setiembre': 9,
+    'oct': 10, 'october': 10, 'octubre': 10,
+    'nov': 11, 'november': 11, 'noviembre': 11,
+    'dec': 12, 'december': 12, 'dic': 12, 'diciembre': 12,
+}
+
+DAY_MONTH_NAME_RE = re.compile(r'\s*(\d{1,2})[ -]([^\W\d_]+)\.?[ -](\d{4})\s*$')
+NUMERIC_DATE_RE = re.compile(r'\s*(\d{1,2})([/-])(\d{1,2})\2(\d{4})\s*$')
+ISO_RE = re.compile(r'\s*(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}))?)?\s*$')
+
+CACHE_SIZE = 1 << 16
+
+def build(year, month, day, hour=0, minute=0, second=0):
+    try:
+        return pd.Timestamp(datetime(year, month, day, hour, minute, second))
+    except ValueError:
+        return None
+
+def fast_parse(text, dayfirst):
+    m = DAY_MONTH_NAME_RE.match(text)
+    if m:
+        month = MONTHS.get(m.group(2).lower())
+        if month:
+            return build(int(m.group(3)), month, int(m.group(1)))
+
+    m = NUMERIC_DATE_RE.match(text)
+    if m:
+        first, second, year = int(m.group(1)), int(m.group(3)), int(m.group(4))
+        day, month = (first, second) if dayfirst else (second, first)
+        if month > 12 and day <= 12:
+            # Only one reading is a valid date, take it (dateutil does the same)
+            day, month = month, day
+        return build(year, month, day)
+
+    m = ISO_RE.match(text)
+    if m:
+        return build(*(int(g) for g in m.groups() if g is not None))
+    return None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_string(text, dayfirst=True):
+    parsed = fast_parse(text, dayfirst)
+    if parsed is not None:
+        return parsed
+    try:
+        return pd.to_datetime(text, dayfirst=dayfirst)
+    except Exception:
+        return None
+
+def parse_date(value, dayfirst=True):
+    if value is None:
+        return pd.NaT
+    if isinstance(value, str):
+        return parse_string(value, dayfirst)
+    if isinstance(value, (datetime, date)):
+        return pd.Timestamp(value)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if value != value:
+            return pd.NaT
+        # Excel serial day number (1900 date system)
+        try:
+            return pd.Timestamp(from_excel(value))
+        except (OverflowError, ValueError, TypeError):
+            return None
+    return None
+
+def parse_dates(values, dayfirst=True):
+    # Batch API over a whole column: every distinct value is parsed once, the
+    # results are broadcast back. Unparseable values become NaT.
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = [parse_date(v, dayfirst) for v in uniques]
+    lookup = pd.DatetimeIndex([pd.NaT if p is None else p for p in parsed] + [pd.NaT])
+    return pd.Series(lookup.take(codes), index=series.index)
+
+def to_iso_date(value, dayfirst=True):
+    parsed = parse_date(value, dayfirst)
+    if parsed is None or pd.isna(parsed):
+        return None
+    return parsed.strftime('%Y-%m-%d')
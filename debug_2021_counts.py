@@ -1,6 +1,7 @@
 
 import sqlite3
 import pandas as pd
+from transaction_dates import period_filter
 
 DB_PATH = 'prisma/dev.db'
 
@@ -14,17 +15,18 @@ def check_2021():
     total = cursor.fetchone()[0]
     print(f"Total Transactions: {total}")
 
-    # Count 2021 transactions (string comparison on ISO date)
-    cursor.execute("SELECT COUNT(*) FROM 'Transaction' WHERE fecha_inicio LIKE '2021%'")
+    # Count 2021 transactions (epoch ms range, uses the fecha_inicio index)
+    where, params = period_filter(2021)
+    cursor.execute(f"SELECT COUNT(*) FROM 'Transaction' WHERE {where}", params)
     count_2021 = cursor.fetchone()[0]
     print(f"Transactions in 2021: {count_2021}")
     
     # Sample some 2021 dates
     if count_2021 > 0:
         print("Sample 2021 Dates:")
-        cursor.execute("SELECT fecha_inicio FROM 'Transaction' WHERE fecha_inicio LIKE '2021%' LIMIT 5")
+        cursor.execute(f"SELECT fecha_inicio FROM 'Transaction' WHERE {where} LIMIT 5", params)
         for row in cursor.fetchall():
-            print(row[0])
+            print(pd.to_datetime(row[0], unit='ms'))
     
     conn.close()
 
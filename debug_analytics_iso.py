@@ -1,5 +1,6 @@
 import sqlite3
 from datetime import datetime, timezone
+from monthly_totals import monthly_totals, yearly_totals
 
 DB_PATH = 'prisma/dev.db'
 
@@ -27,6 +28,8 @@ def check_analytics_query():
     count, total_sales = cursor.fetchone()
     print(f"Count: {count}")
     print(f"Total Sales: {total_sales}")
+    expected = yearly_totals(cursor, [2021])[2021]
+    print(f"Expected (monthly totals): {expected[3]} / {expected[2]}")
     
     # Simulate Year=2021, Month=1 (January)
     # Start: 2021-01-01T00:00:00.000Z
@@ -46,6 +49,8 @@ def check_analytics_query():
     count_jan, total_sales_jan = cursor.fetchone()
     print(f"Count (Jan): {count_jan}")
     print(f"Total Sales (Jan): {total_sales_jan}")
+    expected_jan = monthly_totals(cursor, 2021).get(1, (0, None))
+    print(f"Expected (monthly totals): {expected_jan[0]} / {expected_jan[1]}")
 
     conn.close()
 
@@ -1,6 +1,7 @@
 
 from openpyxl import load_workbook
 import os
+from treinta_parser import sniff_header, build_col_map
 
 FILE_PATH = r'c:/Users/Power/Desktop/datos_migracion/DATOS/2024/a0c2bff7-95d3-4d30-900a-4e7f231383fa-05122501533.xlsx'
 
@@ -18,27 +19,10 @@ def debug_dates():
                 rows_iter = ws.iter_rows(values_only=True)
                 
                 # Find header
-                header_row_idx = None
-                rows_buffer = []
-                for i in range(20):
-                    try:
-                        row = next(rows_iter)
-                        rows_buffer.append(row)
-                        row_str = " ".join([str(x) for x in row if x is not None])
-                        if "Fecha" in row_str and "Tipo" in row_str:
-                            header_row_idx = i
-                            break
-                    except StopIteration:
-                        break
+                rows_buffer, header_row_idx = sniff_header(rows_iter)
                 
                 if header_row_idx is not None:
-                     header = rows_buffer[header_row_idx]
-                     col_idx = -1
-                     for c_idx, val in enumerate(header):
-                         val_str = str(val).lower() if val else ""
-                         if "fecha" in val_str: 
-                             col_idx = c_idx
-                             break
+                     col_idx = build_col_map(rows_buffer[header_row_idx]).get('date', -1)
                      
                      if col_idx != -1:
                          # Get next 5 dates
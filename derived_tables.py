@@ -0,0 +1,47 @@
+# Tables derived from "Transaction" (monthly_totals.py, transaction_search.py)
+# are kept current by SQLite triggers, not by whoever wrote the rows: the
+# loader, import_json.ts, the fix_*.js scripts, the app and
+# check_duplicates.py --delete all update them in the same statement, so a
+# reader never sees a table that disagrees with "Transaction".
+#
+# Each module describes its table as the CREATE statements, its triggers by
+# name and a fill(cursor) that computes the contents from scratch. The first
+# ensure_derived() on a database creates the table, fills it and installs
+# the triggers; from then on the triggers alone keep it current.
+#
+# Only the loader and each module's --rebuild call ensure_derived(). Reports
+# never create anything in the app database: they check derived_ready() and
+# fall back to scanning "Transaction" (or stop) when it says no.
+
+def missing_triggers(cursor, triggers):
+    names = list(triggers)
+    placeholders = ','.join('?' for _ in names)
+    cursor.execute(f"SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})", names)
+    return set(names) - {row[0] for row in cursor.fetchall()}
+
+def derived_ready(cursor, table, triggers):
+    # -> True when table exists and every trigger keeping it current is installed
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')", (table,))
+    return cursor.fetchone() is not None and not missing_triggers(cursor, triggers)
+
+def drop_triggers(cursor, triggers):
+    # For bulk rewrites inside one transaction: the next ensure_derived()
+    # refills the table in one pass and puts the triggers back
+    for name in triggers:
+        cursor.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+
+def ensure_derived(cursor, tables, triggers, fill):
+    # tables: CREATE ... IF NOT EXISTS statements, triggers: {name: CREATE
+    # TRIGGER sql}. -> True when the table had to be (re)built. Until every
+    # trigger exists the contents can't be trusted (written by hand, or by an
+    # older version that kept them from the loader only), so they are refilled
+    # before the triggers go in.
+    for sql in tables:
+        cursor.execute(sql)
+    if not missing_triggers(cursor, triggers):
+        return False
+    drop_triggers(cursor, triggers)
+    fill(cursor)
+    for sql in triggers.values():
+        cursor.execute(sql)
+    return True
@@ -0,0 +1,74 @@
+import pandas as pd
+from treinta_parser import open_workbook, sniff_header
+
+# Income / expense totals straight from the Treinta workbooks, to check the
+# database against the source (verify_excel_sum.py, verify_excel_multisheet.py).
+#
+# Each sheet is streamed once: the header is sniffed from the first rows
+# (same rule as the loader, treinta_parser.sniff_header) and the rows under
+# it come from the same iterator, no second read. Totals are masks over the
+# Tipo / Valor columns, not a Python loop per row.
+
+INCOME_TYPES = r'ingreso|venta'
+EXPENSE_TYPES = r'gasto|egreso|compra'
+TYPE_HEADERS = ('tipo',)
+AMOUNT_HEADERS = ('monto', 'valor', 'precio')
+
+def find_column(header, names):
+    # -> index of the first header cell containing one of names, or None
+    for idx, cell in enumerate(header):
+        cell = str(cell).lower().strip() if cell is not None else ''
+        if any(name in cell for name in names):
+            return idx
+    return None
+
+def parse_amounts(values):
+    # Numbers as they are, text as Colombian currency ("$12.000,50"); NaN otherwise
+    if values.dtype != object:
+        return pd.to_numeric(values, errors='coerce')
+    text = values.str.replace('$', '', regex=False).str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    numbers = pd.to_numeric(values.where(text.isna()), errors='coerce')
+    return pd.to_numeric(text, errors='coerce').fillna(numbers)
+
+def sheet_totals(ws):
+    # -> (income, expenses) of one sheet, None if it has no header or no tipo/monto columns
+    rows_iter = ws.iter_rows(values_only=True)
+    rows_buffer, header_idx = sniff_header(rows_iter)
+    if header_idx is None:
+        return None
+    header = rows_buffer[header_idx]
+    type_col = find_column(header, TYPE_HEADERS)
+    amount_col = find_column(header, AMOUNT_HEADERS)
+    if type_col is None or amount_col is None:
+        return None
+
+    rows = rows_buffer[header_idx + 1:]
+    rows.extend(rows_iter)
+    block = pd.DataFrame(rows)
+    if block.empty or max(type_col, amount_col) >= block.shape[1]:
+        return 0.0, 0.0
+
+    kind = block[type_col].astype(str).str.lower()
+    amounts = parse_amounts(block[amount_col])
+    income = kind.str.contains(INCOME_TYPES)
+    expense = kind.str.contains(EXPENSE_TYPES) & ~income
+    return float(amounts[income].sum()), float(amounts[expense].sum())
+
+def workbook_totals(file_path, progress=False):
+    # -> (income, expenses) summed over the workbook's sheets
+    income = expenses = 0.0
+    wb = open_workbook(file_path)
+    try:
+        sheet_names = wb.sheetnames
+        if progress:
+            print(f"Total Sheets: {len(sheet_names)}")
+        for idx, sheet_name in enumerate(sheet_names):
+            if progress and idx % 100 == 0:
+                print(f"Scanning sheet {idx}/{len(sheet_names)}...", end='\r')
+            totals = sheet_totals(wb[sheet_name])
+            if totals is not None:
+                income += totals[0]
+                expenses += totals[1]
+    finally:
+        wb.close()
+    return income, expenses
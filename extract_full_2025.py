@@ -1,88 +1,77 @@
-import pandas as pd
+from balance_extract import extract_balance
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import json
+import time
+import sys
 import os
 import glob
 
 directory = r'C:\Users\Power\Desktop\datos_migracion\DATOS\2025'
-nov_file = 'balance-1764983362.xlsx'
+OUTPUT_FILE = 'full_2025_data.json'
 
-def parse_spanish_date(date_str):
-    months = {
-        'ene': '01', 'feb': '02', 'mar': '03', 'abr': '04', 'may': '05', 'jun': '06',
-        'jul': '07', 'ago': '08', 'sep': '09', 'oct': '10', 'nov': '11', 'dic': '12',
-        'jan': '01', 'apr': '04', 'aug': '08', 'dec': '12'
-    }
-    try:
-        if isinstance(date_str, pd.Timestamp):
-            return date_str.strftime('%Y-%m-%d')
-            
-        parts = str(date_str).lower().replace('.', '').split()
-        if len(parts) >= 3:
-            day = parts[0].zfill(2)
-            month = months.get(parts[1][:3], '01')
-            year = parts[2]
-            return f"{year}-{month}-{day}"
-    except:
-        pass
-    return None
+# Output feeds import_full_2025.ts (January-October). November was imported
+# by import_november.ts, which keeps no record of it, so it is excluded by
+# name. advanced_migration's _migration_sources manifest is no guide here:
+# it tracks the Python loader, not the TS importers.
+NOV_FILE = 'balance-1764983362.xlsx'
 
-all_data = []
-files = glob.glob(os.path.join(directory, '*.xlsx'))
+def extract_file(file_path):
+    start = time.perf_counter()
+    records, invalid = extract_balance(file_path)
+    return records.to_dict('records'), len(invalid), time.perf_counter() - start
 
-print(f"Found {len(files)} files.")
+def select_files(files, exclude):
+    selected = []
+    for file_path in files:
+        filename = os.path.basename(file_path)
+        if filename in exclude:
+            print(f"Skipping {filename} (excluded)")
+        else:
+            selected.append(file_path)
+    return selected
 
-for file_path in files:
-    filename = os.path.basename(file_path)
-    if filename == nov_file:
-        print(f"Skipping {filename} (Already imported)")
-        continue
-        
-    print(f"Processing {filename}...")
-    try:
-        df = pd.read_excel(file_path, sheet_name='Hoja1', header=None)
-        
-        extracted_count = 0
-        for i, row in df.iterrows():
-            if i < 14: continue 
-            
-            if pd.isna(row[1]) or str(row[1]).strip() == '': continue
-            
+def main():
+    parser = argparse.ArgumentParser(description="Extract the 2025 balance-*.xlsx exports to full_2025_data.json")
+    parser.add_argument('--dir', default=directory, help="folder with the balance-*.xlsx files")
+    parser.add_argument('--exclude', nargs='*', default=[NOV_FILE], metavar='FILE',
+                        help=f"file names to skip (default: {NOV_FILE}, already imported)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.dir, '*.xlsx')))
+    print(f"Found {len(files)} files.")
+    files = select_files(files, set(args.exclude))
+    if not files:
+        # Never replace the output with an empty list
+        sys.exit(f"No files selected, {args.output} left untouched.")
+
+    start = time.perf_counter()
+    all_data = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {file_path: pool.submit(extract_file, file_path) for file_path in files}
+        for file_path, future in futures.items():
+            filename = os.path.basename(file_path)
             try:
-                amount_val = row[9]
-                if isinstance(amount_val, str):
-                    amount_val = amount_val.replace('$', '').replace(',', '').strip()
-                amount = float(amount_val)
-            except:
+                records, invalid, elapsed = future.result()
+            except Exception as e:
+                print(f"  -> Error processing {filename}: {e}")
                 continue
+            note = f", {invalid} invalid amounts" if invalid else ""
+            print(f"  {filename}: {len(records)} records in {elapsed:.2f}s{note}")
+            all_data.extend(records)
 
-            date_parsed = parse_spanish_date(row[1])
-            if not date_parsed: continue # Skip invalid dates
-
-            record = {
-                'date': date_parsed,
-                'type': str(row[2]).strip(),
-                'client': str(row[6]).strip() if not pd.isna(row[6]) else 'Cliente General',
-                'description': str(row[4]).strip() if not pd.isna(row[4]) else '-',
-                'method': str(row[8]).strip() if not pd.isna(row[8]) else 'EFECTIVO',
-                'amount': amount,
-                'status': str(row[7]).strip() if not pd.isna(row[7]) else 'Pagado'
-            }
-            
-            method_map = {'transferencia bancaria': 'BANCOLOMBIA', 'nequi': 'NEQUI', 'efectivo': 'EFECTIVO'}
-            for k, v in method_map.items():
-                if k in record['method'].lower():
-                    record['method'] = v
-                    break
-                    
-            all_data.append(record)
-            extracted_count += 1
-            
-        print(f"  -> Extracted {extracted_count} records.")
-        
-    except Exception as e:
-        print(f"  -> Error processing {filename}: {e}")
+    # Ordered merge: by date, file order and row order kept within a day
+    all_data.sort(key=lambda r: r['date'])
+    print(f"Total extracted records: {len(all_data)} from {len(files)} files in {time.perf_counter() - start:.2f}s")
+    if not all_data:
+        sys.exit(f"Nothing extracted, {args.output} left untouched.")
 
-print(f"Total extracted records: {len(all_data)}")
+    tmp = args.output + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(all_data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, args.output)
 
-with open('full_2025_data.json', 'w', encoding='utf-8') as f:
-    json.dump(all_data, f, indent=2, ensure_ascii=False)
+if __name__ == '__main__':
+    main()
@@ -1,122 +1,181 @@
-import openpyxl
+import argparse
 import json
 import glob
 import os
+from collections import namedtuple
 from datetime import datetime
+import pandas as pd
+from date_normalizer import parse_date
+from parse_cache import cached_parse
+from treinta_parser import open_workbook, chain_rows
+
+# Streams the 2023-2025 Treinta exports into services_to_restore.json for
+# restore_services.js. Workbooks are read row by row (read-only reader) and
+# each file's records are written out before the next file is opened, so
+# memory stays at one workbook's records. --debug echoes the header sniff.
+#
+# Header and column rules are this script's own, not treinta_parser's: the
+# header is the first row mentioning fecha and cliente/contacto (any case),
+# the amount may sit under Total/Precio and the service under
+# Servicio/Producto as well as Descripción.
 
 EXCEL_FILES = glob.glob("DATOS/**/*.xlsx", recursive=True)
 OUTPUT_FILE = "services_to_restore.json"
+YEARS = ("2023", "2024", "2025")
 
-restoration_data = []
+HEADER_SNIFF_ROWS = 20
 
-print(f"Scanning {len(EXCEL_FILES)} Excel files...")
+# First match wins per header cell, a later cell overrides an earlier one
+COLUMN_RULES = (
+    ('date', ('fecha',)),
+    ('client', ('cliente', 'contacto')),
+    ('amount', ('monto', 'valor', 'total', 'precio')),
+    ('service', ('descripci', 'servicio', 'producto')),
+)
 
-for file in EXCEL_FILES:
-    # Processing only recent years to save time/focus
-    if "2023" not in file and "2024" not in file and "2025" not in file:
-        continue
-        
-    print(f"Processing {file}...")
+# Bump whenever extraction rules change so cached results are invalidated
+EXTRACTOR_VERSION = 2
+
+RestoreRecord = namedtuple('RestoreRecord', 'phone date amount service')
+
+def extract_file(file, debug=False):
+    records = []
+    wb = open_workbook(file)
     try:
-        wb = openpyxl.load_workbook(file, data_only=True)
-        
         for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            rows_iter = ws.iter_rows(values_only=True)
+            extract_sheet(wb[sheet_name], sheet_name, records, debug)
+    finally:
+        wb.close()
+    return records
+
+def find_header(rows_iter, debug=False):
+    # -> (buffered rows, index of the header row or None)
+    rows_buffer = []
+    for i in range(HEADER_SNIFF_ROWS):
+        try:
+            row = next(rows_iter)
+        except StopIteration:
+            break
+        rows_buffer.append(row)
+        row_str = " ".join([str(x).lower() for x in row if x is not None])
+        if debug:
+            print(f"    [ROW {i}] {row_str}")
+        if "fecha" in row_str and ("cliente" in row_str or "contacto" in row_str):
+            if debug:
+                print(f"    Found header at row {i}")
+            return rows_buffer, i
+    return rows_buffer, None
+
+def map_columns(header):
+    col_map = {}
+    for idx, val in enumerate(header):
+        val_str = str(val).lower() if val else ""
+        for key, names in COLUMN_RULES:
+            if any(name in val_str for name in names):
+                col_map[key] = idx
+                break
+    return col_map
+
+def extract_sheet(ws, sheet_name, records, debug):
+    rows_iter = ws.iter_rows(values_only=True)
+    
+    # Buffer first 20 rows to find header
+    rows_buffer, header_row_idx = find_header(rows_iter, debug)
+    if header_row_idx is None:
+        return
+        
+    col_map = map_columns(rows_buffer[header_row_idx])
+    
+    if 'client' not in col_map or 'amount' not in col_map or 'service' not in col_map:
+        print(f"Skipping Sheet {sheet_name}: Missing cols in {col_map}")
+        return
+
+    # Process Data
+    data_rows = rows_buffer[header_row_idx+1:]
+    
+    # Combine buffered rows and remaining iterator
+    for row in chain_rows(data_rows, rows_iter):
+        try:
+            # Extract values
+            if len(row) <= max(col_map.values()): continue
             
-            # Buffer first 20 rows to find header
-            header_row_idx = None
-            rows_buffer = []
+            raw_date = row[col_map['date']]
+            raw_client = row[col_map['client']]
+            raw_amount = row[col_map['amount']]
+            raw_service = row[col_map['service']]
             
-            for i in range(20):
-                try:
-                    row = next(rows_iter)
-                    rows_buffer.append(row)
-                    row_str = " ".join([str(x).lower() for x in row if x is not None])
-                    print(f"    [ROW {i}] {row_str}") 
-                    if "fecha" in row_str and ("cliente" in row_str or "contacto" in row_str):
-                        header_row_idx = i
-                        print(f"    Found header at row {i}")
-                        break
-                except StopIteration:
-                    break
+            # Normalize Date (text dates like the other parsers, day first)
+            date_val = None
+            if isinstance(raw_date, datetime):
+                date_val = raw_date
+            elif isinstance(raw_date, str):
+                date_val = parse_date(raw_date)
+                if date_val is not None and pd.isna(date_val):
+                    date_val = None
             
-            if header_row_idx is None:
-                continue
+            # Normalize Client (Phone)
+            client_val = None
+            if raw_client:
+                s = str(raw_client).replace('.0', '').strip()
+                if len(s) >= 7: client_val = s
                 
-            # Map columns
-            header = rows_buffer[header_row_idx]
-            col_map = {}
-            for idx, val in enumerate(header):
-                val_str = str(val).lower() if val else ""
-                if "fecha" in val_str: col_map['date'] = idx
-                elif "cliente" in val_str or "contacto" in val_str: col_map['client'] = idx
-                elif "monto" in val_str or "valor" in val_str or "total" in val_str or "precio" in val_str: col_map['amount'] = idx
-                elif "descripci" in val_str or "servicio" in val_str or "producto" in val_str: col_map['service'] = idx
-            
-            if 'client' not in col_map or 'amount' not in col_map or 'service' not in col_map:
-                print(f"Skipping Sheet {sheet_name}: Missing cols in {col_map}")
-                continue
-
-            # Process Data
-            data_rows = rows_buffer[header_row_idx+1:]
-            
-            # Combine buffered rows and remaining iterator
-            def row_generator():
-                for r in data_rows: yield r
-                for r in rows_iter: yield r
+            # Normalize Amount
+            amount_val = 0
+            if raw_amount:
+                try: amount_val = float(raw_amount)
+                except: pass
                 
-            for row in row_generator():
-                try:
-                    # Extract values
-                    if len(row) <= max(col_map.values()): continue
+            # Normalize Service
+            service_val = None
+            if raw_service:
+                s = str(raw_service).strip()
+                if s and s.lower() not in ['nan', 'none', '']:
+                    service_val = s
                     
-                    raw_date = row[col_map['date']]
-                    raw_client = row[col_map['client']]
-                    raw_amount = row[col_map['amount']]
-                    raw_service = row[col_map['service']]
-                    
-                    # Normalize Date
-                    date_val = None
-                    if isinstance(raw_date, datetime):
-                        date_val = raw_date
-                    elif isinstance(raw_date, str):
-                        try: date_val = datetime.strptime(raw_date, "%d/%m/%Y")
-                        except: pass
-                    
-                    # Normalize Client (Phone)
-                    client_val = None
-                    if raw_client:
-                        s = str(raw_client).replace('.0', '').strip()
-                        if len(s) >= 7: client_val = s
-                        
-                    # Normalize Amount
-                    amount_val = 0
-                    if raw_amount:
-                        try: amount_val = float(raw_amount)
-                        except: pass
-                        
-                    # Normalize Service
-                    service_val = None
-                    if raw_service:
-                        s = str(raw_service).strip()
-                        if s and s.lower() not in ['nan', 'none', '']:
-                            service_val = s
-                            
-                    if date_val and client_val and amount_val > 0 and service_val:
-                         restoration_data.append({
-                            'phone': client_val,
-                            'date': date_val.strftime('%Y-%m-%d'),
-                            'amount': amount_val,
-                            'service': service_val
-                        })
-                        
-                except Exception as e:
-                    continue
-
-    except Exception as e:
-        print(f"Error extracting {file}: {e}")
-
-print(f"Found {len(restoration_data)} records to restore.")
-with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-    json.dump(restoration_data, f, indent=2, ensure_ascii=False)
+            if date_val and client_val and amount_val > 0 and service_val:
+                 records.append(RestoreRecord(client_val, date_val.strftime('%Y-%m-%d'), amount_val, service_val))
+                
+        except Exception as e:
+            continue
+
+def write_records(f, records, first):
+    # Same bytes json.dump(all_records, f, indent=2) would write, one record at a time
+    for r in records:
+        item = json.dumps(r._asdict(), indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        f.write(('[\n  ' if first else ',\n  ') + item)
+        first = False
+    return first
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract services to restore from the Treinta exports")
+    parser.add_argument('--debug', action='store_true', help="echo the first rows of every sheet ([ROW i])")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    # Processing only recent years to save time/focus
+    files = [f for f in EXCEL_FILES if any(y in f for y in YEARS)]
+    print(f"Scanning {len(EXCEL_FILES)} Excel files...")
+
+    total, first = 0, True
+    tmp = args.output + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for file in files:
+            print(f"Processing {file}...")
+            try:
+                if args.debug: # echo needs a real parse, not a cache hit
+                    records = extract_file(file, debug=True)
+                else:
+                    records = cached_parse(file, 'restore', EXTRACTOR_VERSION, RestoreRecord, extract_file)
+            except Exception as e:
+                print(f"Error extracting {file}: {e}")
+                continue
+            first = write_records(f, records, first)
+            f.flush()
+            total += len(records)
+        f.write('[]' if first else '\n]')
+    os.replace(tmp, args.output)
+
+    print(f"Found {total} records to restore.")
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,12 @@
-
-import sqlite3
+from ledger_store import ensure_ledger, outliers
 
 def find_outlier():
-    conn = sqlite3.connect('prisma/dev.db')
-    cursor = conn.cursor()
+    # Reads the Parquet ledger (ledger_store.py), re-exported when dev.db is newer
+    ensure_ledger()
     
     print("Searching for massive outliers...")
-    cursor.execute("SELECT id, monto, fecha_inicio, clienteId FROM 'Transaction' ORDER BY monto ASC LIMIT 5")
-    rows = cursor.fetchall()
-    
-    for r in rows:
-        print(f"ID: {r[0]}, Amount: {r[1]}, Date: {r[2]}")
-        
-    conn.close()
+    for r in outliers(5).itertuples(index=False):
+        print(f"ID: {r.id}, Amount: {r.monto}, Date: {r.fecha.date()} ({r.mad_score:.0f} MADs from the median)")
 
 if __name__ == '__main__':
     find_outlier()
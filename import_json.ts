@@ -1,47 +1,52 @@
-
 const { PrismaClient } = require('@prisma/client')
 const fs = require('fs')
-const nodeCrypto = require('crypto')
+const readline = require('readline')
+const zlib = require('zlib')
+const { buildIdentityIndex, resolveClientId } = require('./src/lib/clientIdentity')
 require('dotenv').config()
 
 const prisma = new PrismaClient()
-const DUMP_FILE = 'transactions_dump.json'
+// transactions_dump.json (array) or transactions_dump.ndjson[.gz] from `export_history.py --ndjson`
+const DUMP_FILE = process.argv[2] || 'transactions_dump.json'
+const BATCH = 2000
+
+// Yields one record at a time. NDJSON dumps are read line by line (gunzipped on
+// the fly for .gz), so memory stays flat however many years were exported.
+async function* readRecords(file: string) {
+    if (!/\.ndjson(\.gz)?$/.test(file)) {
+        yield* JSON.parse(fs.readFileSync(file, 'utf-8'))
+        return
+    }
 
-function generateDummyPhone(name: any) {
-    const hash = nodeCrypto.createHash('md5').update(name || "Unknown").digest('hex')
-    const nums = hash.replace(/\D/g, '').substring(0, 10).padEnd(10, '0')
-    return nums
+    let input = fs.createReadStream(file)
+    if (file.endsWith('.gz')) input = input.pipe(zlib.createGunzip())
+
+    const lines = readline.createInterface({ input, crlfDelay: Infinity })
+    for await (const line of lines) {
+        if (line.trim()) yield JSON.parse(line)
+    }
 }
 
 async function main() {
-    console.log("Starting Import from JSON (Sequential Client Mode)...")
+    console.log("Starting Import from JSON (Streaming Mode)...")
 
     if (!fs.existsSync(DUMP_FILE)) {
         console.error("Dump file not found!")
         return
     }
 
-    const data = JSON.parse(fs.readFileSync(DUMP_FILE, 'utf-8'))
-    console.log(`Loaded ${data.length} records.`)
-
-    // 1. Pre-load / Create Clients
-    console.log("Processing Clients...")
-    const uniqueClients = new Map()
-    data.forEach((item: any) => {
-        const name = item.client_name || "Unknown"
-        const phone = generateDummyPhone(name)
-        if (!uniqueClients.has(phone)) {
-            uniqueClients.set(phone, name)
-        }
-    })
-
-    console.log(`Found ${uniqueClients.size} unique clients. Upserting sequentially...`)
+    // Same IDs as advanced_migration.py; existing clients keep theirs so
+    // re-imports upsert instead of duplicating
+    const identity = buildIdentityIndex(await prisma.client.findMany({ select: { celular: true, nombre: true } }))
+    const seenClients = new Set<string>()
+    const serviceToIds: Record<string, { accountId: number, profileId: number }> = {} // service -> { accountId, profileId }
 
-    // Upsert clients SEQUENTIALLY to avoid connection pool exhaustion
-    const clientArray = Array.from(uniqueClients.entries())
+    // Upsert clients SEQUENTIALLY (on first sight) to avoid connection pool exhaustion
+    async function ensureClient(name: string) {
+        const phone = resolveClientId(identity, name)
+        if (seenClients.has(phone)) return phone
+        seenClients.add(phone)
 
-    for (let i = 0; i < clientArray.length; i++) {
-        const [phone, name] = clientArray[i]
         try {
             await prisma.client.upsert({
                 where: { celular: phone },
@@ -52,15 +57,13 @@ async function main() {
             console.error(`Failed client ${name}`, e.code)
         }
 
-        if (i % 500 === 0) console.log(`Upserted clients ${i}/${uniqueClients.size}`)
+        if (seenClients.size % 500 === 0) console.log(`Upserted clients ${seenClients.size}`)
+        return phone
     }
 
-    // 2. Pre-load / Create Services (Accounts)
-    console.log("Processing Services...")
-    const uniqueServices = new Set<string>(data.map((d: any) => d.service || "GENERICO"))
-    const serviceToIds: Record<string, { accountId: number, profileId: number }> = {} // service -> { accountId, profileId }
+    async function ensureService(service: string) {
+        if (serviceToIds[service]) return serviceToIds[service]
 
-    for (const service of uniqueServices) {
         let accountId, profileId
         const existingAccount = await prisma.inventoryAccount.findFirst({
             where: { servicio: service }
@@ -98,25 +101,49 @@ async function main() {
             profileId = newProf.id
         }
         serviceToIds[service] = { accountId, profileId }
+        return serviceToIds[service]
     }
 
-    // 3. Batch Insert Transactions
-    console.log("Inserting Transactions (Batch)...")
+    let expensesToInsert: any[] = []
+    let transactionsToInsert: any[] = []
+    let expenseCount = 0
+    let transactionCount = 0
 
-    const expensesToInsert = []
-    const transactionsToInsert = []
+    async function flushExpenses() {
+        if (expensesToInsert.length === 0) return
+        await prisma.expense.createMany({
+            data: expensesToInsert,
+            skipDuplicates: true
+        })
+        expenseCount += expensesToInsert.length
+        console.log(`Expenses ${expenseCount} inserted`)
+        expensesToInsert = []
+    }
 
-    for (const item of (data as any[])) {
+    async function flushTransactions() {
+        if (transactionsToInsert.length === 0) return
+        await prisma.transaction.createMany({
+            data: transactionsToInsert,
+            skipDuplicates: true
+        })
+        transactionCount += transactionsToInsert.length
+        console.log(`Transactions ${transactionCount} inserted`)
+        transactionsToInsert = []
+    }
+
+    // Single pass: clients and services are created the first time they show
+    // up, rows are inserted in batches of BATCH as they stream in.
+    for await (const item of readRecords(DUMP_FILE)) {
         try {
+            const clientPhone = await ensureClient(item.client_name || "Unknown")
+            const meta = await ensureService(item.service || "GENERICO")
+
             // Validate Date
             const date = new Date(item.date)
             if (isNaN(date.getTime())) continue
 
             const amount = Number(item.price) || 0
             const desc = item.description || ""
-            const clientPhone = generateDummyPhone(item.client_name || "Unknown")
-
-            const meta = serviceToIds[item.service || "GENERICO"]
 
             if (item.type === 'EGRESO') {
                 expensesToInsert.push({
@@ -126,6 +153,7 @@ async function main() {
                     fecha: date,
                     metodo_pago: 'EFECTIVO'
                 })
+                if (expensesToInsert.length >= BATCH) await flushExpenses()
             } else {
                 transactionsToInsert.push({
                     clienteId: clientPhone,
@@ -139,41 +167,22 @@ async function main() {
                     descripcion: desc.substring(0, 190),
                     updatedAt: new Date(),
                 })
+                if (transactionsToInsert.length >= BATCH) await flushTransactions()
             }
         } catch (e) {
             console.error("Parse error", e)
         }
     }
 
-    // Insert Expenses
-    if (expensesToInsert.length > 0) {
-        console.log(`Inserting ${expensesToInsert.length} expenses...`)
-        const BATCH = 2000
-        for (let i = 0; i < expensesToInsert.length; i += BATCH) {
-            const chunk = expensesToInsert.slice(i, i + BATCH)
-            await prisma.expense.createMany({
-                data: chunk,
-                skipDuplicates: true
-            })
-            console.log(`Expenses ${i + chunk.length}/${expensesToInsert.length} inserted`)
-        }
-    }
+    await flushExpenses()
+    await flushTransactions()
 
-    // Insert Transactions
-    if (transactionsToInsert.length > 0) {
-        console.log(`Inserting ${transactionsToInsert.length} transactions...`)
-        const BATCH = 2000
-        for (let i = 0; i < transactionsToInsert.length; i += BATCH) {
-            const chunk = transactionsToInsert.slice(i, i + BATCH)
-            await prisma.transaction.createMany({
-                data: chunk,
-                skipDuplicates: true
-            })
-            console.log(`Transactions ${i + chunk.length}/${transactionsToInsert.length} inserted`)
-        }
+    if (identity.collisions.length > 0) {
+        console.warn(`${identity.collisions.length} client ID collisions resolved by probing:`)
+        for (const [norm, owner, id] of identity.collisions) console.warn(`   "${norm}" vs "${owner}" on ${id}`)
     }
 
-    console.log("Import Complete!")
+    console.log(`Import Complete! ${seenClients.size} clients, ${transactionCount} transactions, ${expenseCount} expenses.`)
 }
 
 main()
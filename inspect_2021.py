@@ -1,12 +1,15 @@
 
 import sqlite3
+from monthly_totals import sign_totals
+from transaction_dates import period_filter
 
 def check_txs():
     conn = sqlite3.connect('prisma/dev.db')
     cursor = conn.cursor()
     
     print("Sampling 2021 transactions...")
-    cursor.execute("SELECT monto, fecha_inicio, id FROM 'Transaction' WHERE fecha_inicio >= 1609459200000 AND fecha_inicio < 1640995200000 LIMIT 20")
+    where, params = period_filter(2021)
+    cursor.execute(f"SELECT monto, fecha_inicio, id FROM 'Transaction' WHERE {where} LIMIT 20", params)
     rows = cursor.fetchall()
     
     # Wait, 'tipo' column doesn't exist in Prisma schema?
@@ -21,12 +24,11 @@ def check_txs():
         print(f"ID: {r[2]}, Date: {r[1]}, Amount: {r[0]}")
 
     print("\nCounting Positive vs Negative for 2021:")
-    cursor.execute("SELECT COUNT(*), SUM(monto) FROM 'Transaction' WHERE fecha_inicio >= 1609459200000 AND fecha_inicio < 1640995200000 AND monto > 0")
-    pos = cursor.fetchone()
+    signs = sign_totals(cursor, 2021)
+    pos = signs.get(1, (0, None))
     print(f"Positive: {pos[0]} rows, Sum: {pos[1]}")
     
-    cursor.execute("SELECT COUNT(*), SUM(monto) FROM 'Transaction' WHERE fecha_inicio >= 1609459200000 AND fecha_inicio < 1640995200000 AND monto < 0")
-    neg = cursor.fetchone()
+    neg = signs.get(-1, (0, None))
     print(f"Negative: {neg[0]} rows, Sum: {neg[1]}")
     
     # Check total
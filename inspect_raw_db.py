@@ -1,5 +1,7 @@
 
+import sys
 import sqlite3
+from transaction_dates import normalize_dates
 
 def check_raw():
     conn = sqlite3.connect('prisma/dev.db')
@@ -21,6 +23,13 @@ def check_raw():
     text_count = cursor.fetchone()[0]
     print(f"Total Text Dates: {text_count}", flush=True)
 
+    if rows and '--fix' in sys.argv:
+        fixed, bad = normalize_dates(cursor)
+        conn.commit()
+        print(f"Rewrote {fixed} dates as epoch ms, {len(bad)} left (unparseable)", flush=True)
+        for tx_id, column, value in bad[:5]:
+            print(f"ID: {tx_id}, {column}: {value!r}", flush=True)
+
     conn.close()
 
 if __name__ == '__main__':
@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+try:
+    import duckdb
+except ImportError: # optional, the queries below only need pyarrow + pandas
+    duckdb = None
+
+# Columnar copy of the transaction ledger for analysis, so ad-hoc questions
+# don't scan prisma/dev.db row by row (or touch the app database at all).
+#
+#   python ledger_store.py export          # dev.db -> ledger/year=2021/month=1/*.parquet
+#   python ledger_store.py top-clients --by total
+#   python ledger_store.py outliers | yoy | keywords arriendo nomina
+#
+# One row per transaction with the joins already done (client name, service),
+# hive-partitioned by year and month so year/month filters only open those
+# files and every query reads just the columns it needs. With duckdb
+# installed, duckdb_connection() exposes the same files as a `ledger` view.
+#
+# The export records which state of dev.db it was taken from (row count,
+# MAX(id), MAX(updatedAt) of "Transaction") in ledger/_source.json, and the
+# ledger is stale whenever the database no longer matches it; file mtimes
+# are not used, a copied or restored ledger is still checked.
+
+DB_PATH = 'prisma/dev.db'
+LEDGER_DIR = 'ledger'
+
+EXPORT_QUERY = '''
+    SELECT t.id, t.fecha_inicio, t.monto, t.clienteId, c.nombre AS cliente,
+           a.servicio, t.descripcion
+    FROM "Transaction" t
+    LEFT JOIN Client c ON c.celular = t.clienteId
+    LEFT JOIN SalesProfile p ON p.id = t.perfilId
+    LEFT JOIN InventoryAccount a ON a.id = p.accountId
+'''
+FINGERPRINT_QUERY = 'SELECT COUNT(*), MAX(id), MAX(updatedAt) FROM "Transaction"'
+FINGERPRINT_FILE = '_source.json' # leading _: skipped by the Parquet dataset scan
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16()), ('month', pa.int8())]), flavor='hive')
+
+def db_fingerprint(conn):
+    return list(conn.execute(FINGERPRINT_QUERY).fetchone())
+
+def export_ledger(db_path=DB_PATH, ledger_dir=LEDGER_DIR):
+    # fecha_inicio is epoch ms (see transaction_dates.py)
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        # Taken before the rows: a write in between only makes the ledger look stale
+        fingerprint = db_fingerprint(conn)
+        df = pd.read_sql_query(EXPORT_QUERY, conn)
+    finally:
+        conn.close()
+
+    df['fecha'] = pd.to_datetime(df.pop('fecha_inicio'), unit='ms')
+    df['year'] = df['fecha'].dt.year.astype('int16')
+    df['month'] = df['fecha'].dt.month.astype('int8')
+    df['sign'] = (df['monto'] > 0).astype('int8') - (df['monto'] < 0).astype('int8')
+    df['servicio'] = df['servicio'].fillna('')
+
+    # Written next to the old copy and swapped in, readers never see half a ledger
+    tmp = ledger_dir + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    ds.write_dataset(pa.Table.from_pandas(df, preserve_index=False), tmp, format='parquet',
+                     partitioning=PARTITIONING, existing_data_behavior='overwrite_or_ignore')
+    with open(os.path.join(tmp, FINGERPRINT_FILE), 'w') as f:
+        json.dump(fingerprint, f)
+    shutil.rmtree(ledger_dir, ignore_errors=True)
+    os.replace(tmp, ledger_dir)
+    return len(df)
+
+def ledger_is_stale(db_path=DB_PATH, ledger_dir=LEDGER_DIR):
+    if not os.path.isdir(ledger_dir):
+        return True
+    if not os.path.exists(db_path):
+        return False
+    try:
+        with open(os.path.join(ledger_dir, FINGERPRINT_FILE)) as f:
+            exported = json.load(f)
+    except (OSError, ValueError):
+        return True
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        return db_fingerprint(conn) != exported
+    finally:
+        conn.close()
+
+def ensure_ledger(db_path=DB_PATH, ledger_dir=LEDGER_DIR):
+    if ledger_is_stale(db_path, ledger_dir):
+        print(f"Exporting {db_path} to {ledger_dir}/ ...")
+        print(f"   -> {export_ledger(db_path, ledger_dir)} transactions")
+
+def load_ledger(columns=None, years=None, sign=None, ledger_dir=LEDGER_DIR):
+    # -> DataFrame; year and sign filters are pushed down to the Parquet scan
+    dataset = ds.dataset(ledger_dir, format='parquet', partitioning=PARTITIONING)
+    condition = None
+    if years is not None:
+        condition = ds.field('year').isin(list(years))
+    if sign is not None:
+        f = ds.field('sign') == sign
+        condition = f if condition is None else condition & f
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+def top_clients(n=20, by='count', years=None):
+    # -> DataFrame cliente, tx_count, total sorted by `by` ('count' or 'total');
+    # transactions without a Client row are left out, like an inner join
+    df = load_ledger(['cliente', 'monto'], years)
+    df = df[df['cliente'].notna()]
+    grouped = df.groupby('cliente', sort=False)['monto'].agg(tx_count='size', total='sum').reset_index()
+    key = 'tx_count' if by == 'count' else 'total'
+    return grouped.nlargest(n, key, keep='first').reset_index(drop=True)
+
+def outliers(n=5, largest=False, years=None):
+    # -> the n smallest (or largest) amounts; plus how far each is from the
+    # median in median absolute deviations
+    df = load_ledger(['id', 'monto', 'fecha', 'clienteId', 'cliente'], years)
+    median = df['monto'].median()
+    mad = (df['monto'] - median).abs().median() or 1.0
+    picked = df.nlargest(n, 'monto') if largest else df.nsmallest(n, 'monto')
+    return picked.assign(mad_score=(picked['monto'] - median) / mad).reset_index(drop=True)
+
+def year_over_year():
+    # -> DataFrame per year: income, expenses, balance, tx_count and income growth
+    df = load_ledger(['year', 'monto', 'sign'])
+    df['income'] = df['monto'].where(df['sign'] > 0, 0.0)
+    df['expenses'] = df['monto'].where(df['sign'] < 0, 0.0)
+    yearly = df.groupby('year').agg(income=('income', 'sum'), expenses=('expenses', 'sum'),
+                                    balance=('monto', 'sum'), tx_count=('monto', 'size'))
+    yearly['income_growth'] = yearly['income'].pct_change()
+    return yearly.reset_index()
+
+def keyword_matches(keywords, years=None, sign=1):
+    # -> transactions whose client name or description contains one of the
+    # keywords as a whole word, with the keyword that matched
+    df = load_ledger(['id', 'fecha', 'cliente', 'descripcion', 'monto'], years, sign)
+    text = (df['cliente'].fillna('') + ' ' + df['descripcion'].fillna('')).str.lower()
+    pattern = r'\b(' + '|'.join(re.escape(k.lower()) for k in keywords) + r')\b'
+    found = text.str.extract(pattern, expand=False)
+    return df[found.notna()].assign(keyword=found[found.notna()]).sort_values('monto', ascending=False)
+
+def duckdb_connection(ledger_dir=LEDGER_DIR):
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed (pip install duckdb)")
+    con = duckdb.connect()
+    con.execute(f"CREATE VIEW ledger AS SELECT * FROM read_parquet('{ledger_dir}/**/*.parquet', hive_partitioning = true)")
+    return con
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f"Columnar ledger exported from {DB_PATH}")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('export')
+    top = sub.add_parser('top-clients')
+    top.add_argument('--by', choices=('count', 'total'), default='count')
+    top.add_argument('-n', type=int, default=20)
+    top.add_argument('--year', type=int, action='append')
+    out = sub.add_parser('outliers')
+    out.add_argument('-n', type=int, default=5)
+    out.add_argument('--largest', action='store_true')
+    sub.add_parser('yoy')
+    kw = sub.add_parser('keywords')
+    kw.add_argument('words', nargs='+')
+    kw.add_argument('--year', type=int, action='append')
+    args = parser.parse_args()
+
+    pd.set_option('display.width', 200)
+    if args.command == 'export':
+        print(f"Exported {export_ledger()} transactions to {LEDGER_DIR}/")
+    else:
+        ensure_ledger()
+        if args.command == 'top-clients':
+            print(top_clients(args.n, args.by, args.year).to_string())
+        elif args.command == 'outliers':
+            print(outliers(args.n, args.largest).to_string())
+        elif args.command == 'yoy':
+            print(year_over_year().to_string())
+        elif args.command == 'keywords':
+            print(keyword_matches(args.words, args.year).to_string())
@@ -1,7 +1,8 @@
 import pandas as pd
 import sqlite3
 import re
-from fuzzywuzzy import process, fuzz
+from client_matching import build_match_index, match_client
+from transaction_dates import epoch_ms
 from datetime import datetime
 
 # Configuration
@@ -107,24 +108,24 @@ def migrate():
     cursor.execute("SELECT celular, nombre FROM Client")
     db_clients = cursor.fetchall()
     client_map = {c[1]: c[0] for c in db_clients} # Name -> Phone
-    client_names = list(client_map.keys())
+    match_index = build_match_index(list(client_map.keys()))
     
     for _, row in treinta.iterrows():
         t_name = clean_name(row.get('Cliente', ''))
         amount = row.get('Monto', 0)
         date_str = row.get('Fecha', datetime.now().strftime('%Y-%m-%d'))
         
-        # Fuzzy Match Name
-        match, score = process.extractOne(t_name, client_names, scorer=fuzz.token_sort_ratio)
+        # Fuzzy Match Name (memoized per name, same scores as token_sort_ratio)
+        match, score = match_client(match_index, t_name)
         
-        if score > 80:
+        if match is not None:
             phone = client_map[match]
             
             # Create Transaction (Dummy profile assignment for now)
             cursor.execute('''
                 INSERT INTO "Transaction" (clienteId, perfilId, estado_pago, fecha_inicio, fecha_vencimiento, monto, createdAt, updatedAt)
                 VALUES (?, 1, 'PAGADO', ?, ?, ?, ?, ?)
-            ''', (phone, date_str, date_str, amount, datetime.now(), datetime.now()))
+            ''', (phone, epoch_ms(date_str), epoch_ms(date_str), amount, epoch_ms(datetime.now()), epoch_ms(datetime.now())))
             
     print("Transactions linked.")
     
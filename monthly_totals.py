@@ -0,0 +1,134 @@
+import argparse
+import sqlite3
+
+from derived_tables import derived_ready, ensure_derived
+
+# Materialized monthly totals of "Transaction", one row per
+# (year, month, sign, service):
+#
+#   sign     1 income (monto > 0), -1 expense (monto < 0), 0 zero-amount rows
+#   service  InventoryAccount.servicio behind the transaction's profile
+#
+# Triggers keep it current (see derived_tables.py): every inserted, deleted
+# or updated transaction adds or subtracts its own row, and re-pointing a
+# profile or renaming a service refills the table. Summary scripts read this
+# table instead of scanning all transactions. Months are UTC, like the
+# loader's fecha_inicio.
+#
+# The table is created by advanced_migration.py or by
+# python monthly_totals.py --rebuild, never by a report: on a database
+# without it the readers run the same grouped query over "Transaction".
+
+DB_PATH = 'prisma/dev.db'
+AGGREGATE_TABLE = '_monthly_totals'
+
+# fecha_inicio is epoch ms
+AGGREGATE_SELECT = '''
+    SELECT CAST(strftime('%Y', t.fecha_inicio / 1000, 'unixepoch') AS INTEGER) AS year,
+           CAST(strftime('%m', t.fecha_inicio / 1000, 'unixepoch') AS INTEGER) AS month,
+           (t.monto > 0) - (t.monto < 0) AS sign,
+           COALESCE(a.servicio, '') AS service,
+           COUNT(*) AS tx_count, SUM(t.monto) AS total
+    FROM "Transaction" t
+    LEFT JOIN SalesProfile p ON p.id = t.perfilId
+    LEFT JOIN InventoryAccount a ON a.id = p.accountId
+    GROUP BY year, month, sign, service
+'''
+FULL_AGGREGATE = f'INSERT INTO "{AGGREGATE_TABLE}" (year, month, sign, service, tx_count, total) {AGGREGATE_SELECT}'
+
+# One transaction's row (`old` or `new` inside a trigger) added or subtracted
+ROW_DELTA = '''
+    INSERT INTO "{table}" (year, month, sign, service, tx_count, total)
+    SELECT CAST(strftime('%Y', {row}.fecha_inicio / 1000, 'unixepoch') AS INTEGER),
+           CAST(strftime('%m', {row}.fecha_inicio / 1000, 'unixepoch') AS INTEGER),
+           ({row}.monto > 0) - ({row}.monto < 0),
+           COALESCE((SELECT a.servicio FROM SalesProfile p JOIN InventoryAccount a ON a.id = p.accountId
+                     WHERE p.id = {row}.perfilId), ''),
+           {sign}, {sign} * {row}.monto
+    WHERE true
+    ON CONFLICT (year, month, sign, service) DO UPDATE SET
+        tx_count = tx_count + excluded.tx_count,
+        total = total + excluded.total;
+'''
+ADD_NEW = ROW_DELTA.format(table=AGGREGATE_TABLE, row='new', sign=1)
+SUBTRACT_OLD = ROW_DELTA.format(table=AGGREGATE_TABLE, row='old', sign=-1) + f'DELETE FROM "{AGGREGATE_TABLE}" WHERE tx_count = 0;'
+REFILL = f'DELETE FROM "{AGGREGATE_TABLE}";' + FULL_AGGREGATE + ';'
+
+AGGREGATE_TRIGGERS = {
+    f'{AGGREGATE_TABLE}_insert': f'CREATE TRIGGER "{AGGREGATE_TABLE}_insert" AFTER INSERT ON "Transaction" BEGIN {ADD_NEW} END',
+    f'{AGGREGATE_TABLE}_delete': f'CREATE TRIGGER "{AGGREGATE_TABLE}_delete" AFTER DELETE ON "Transaction" BEGIN {SUBTRACT_OLD} END',
+    f'{AGGREGATE_TABLE}_update': f'CREATE TRIGGER "{AGGREGATE_TABLE}_update" AFTER UPDATE OF fecha_inicio, monto, perfilId ON "Transaction" BEGIN {SUBTRACT_OLD} {ADD_NEW} END',
+    f'{AGGREGATE_TABLE}_profile': f'CREATE TRIGGER "{AGGREGATE_TABLE}_profile" AFTER UPDATE OF accountId ON SalesProfile BEGIN {REFILL} END',
+    f'{AGGREGATE_TABLE}_service': f'CREATE TRIGGER "{AGGREGATE_TABLE}_service" AFTER UPDATE OF servicio ON InventoryAccount BEGIN {REFILL} END',
+}
+
+def fill_aggregates(cursor):
+    cursor.execute(f'DELETE FROM "{AGGREGATE_TABLE}"')
+    cursor.execute(FULL_AGGREGATE)
+
+def ensure_aggregates(cursor):
+    ensure_derived(cursor, [f'''
+        CREATE TABLE IF NOT EXISTS "{AGGREGATE_TABLE}" (
+            "year" INTEGER NOT NULL,
+            "month" INTEGER NOT NULL,
+            "sign" INTEGER NOT NULL,
+            "service" TEXT NOT NULL,
+            "tx_count" INTEGER NOT NULL,
+            "total" REAL NOT NULL,
+            PRIMARY KEY ("year", "month", "sign", "service")
+        )
+    '''], AGGREGATE_TRIGGERS, fill_aggregates)
+
+def rebuild_aggregates(cursor):
+    ensure_aggregates(cursor)
+    fill_aggregates(cursor)
+
+def aggregate_source(cursor):
+    # -> what the readers select from: the table once it is installed, else
+    # the same aggregate computed by a scan of "Transaction"
+    if derived_ready(cursor, AGGREGATE_TABLE, AGGREGATE_TRIGGERS):
+        return f'"{AGGREGATE_TABLE}"'
+    return f'({AGGREGATE_SELECT})'
+
+def yearly_totals(cursor, years=None):
+    # -> {year: (income, expenses, balance, count)}
+    cursor.execute(f'''
+        SELECT year,
+               SUM(CASE WHEN sign > 0 THEN total ELSE 0 END),
+               SUM(CASE WHEN sign < 0 THEN total ELSE 0 END),
+               SUM(total), SUM(tx_count)
+        FROM {aggregate_source(cursor)} GROUP BY year ORDER BY year
+    ''')
+    totals = {row[0]: row[1:] for row in cursor.fetchall()}
+    if years is not None:
+        totals = {y: totals.get(y, (0, 0, 0, 0)) for y in years}
+    return totals
+
+def monthly_totals(cursor, year, sign=None):
+    # -> {month: (count, total)}, optionally only one sign
+    query = f'SELECT month, SUM(tx_count), SUM(total) FROM {aggregate_source(cursor)} WHERE year = ?'
+    params = [year]
+    if sign is not None:
+        query += ' AND sign = ?'
+        params.append(sign)
+    cursor.execute(query + ' GROUP BY month ORDER BY month', params)
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def sign_totals(cursor, year):
+    # -> {sign: (count, total)} for one year
+    cursor.execute(f'SELECT sign, SUM(tx_count), SUM(total) FROM {aggregate_source(cursor)} WHERE year = ? GROUP BY sign', (year,))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f"Show or rebuild {AGGREGATE_TABLE} in {DB_PATH}")
+    parser.add_argument('--rebuild', action='store_true', help="recompute it from every transaction")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    if args.rebuild:
+        rebuild_aggregates(cursor)
+        conn.commit()
+    for year, (income, expenses, balance, count) in yearly_totals(cursor).items():
+        print(f"{year}: {count} transactions, income ${income:,.0f}, expenses ${expenses:,.0f}, balance ${balance:,.0f}")
+    conn.close()
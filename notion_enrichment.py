@@ -0,0 +1,159 @@
+import re
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from client_identity import UNNAMED, identity_name
+from notion_parser import SERVICE_ALIASES
+from service_classifier import DEFAULT_SERVICE
+
+# Joins Notion sales lines (service, account email, screens) to the Treinta
+# money rows, which only carry client, date and amount.
+#
+# Notion records are hashed once on (match name, year, month, price bucket);
+# every Treinta transaction then probes a fixed list of keys, so the join is
+# linear in both sources instead of pairwise:
+#
+#   1. full match name, same month      3. first name, same month
+#   2. full match name, month -1 / +1   4. first name, month -1 / +1
+#
+# The match name drops what Treinta appends to contacts ("Lina Torres Nfx",
+# "Verónica Rojas 2"). Each Notion record enriches at most one transaction,
+# taken in page order.
+#
+# What Notion adds beyond the service is kept on the transaction side: the
+# original line in "Transaction".descripcion, the account email and screens
+# sold in DETAILS_TABLE, one row per matched transaction. Records are keyed
+# by page and position ("2023/Enero ....html:12"), stored with the match, so
+# an incremental load marks the records its kept rows hold as used
+# (mark_used) instead of handing them out again. No inventory rows are made
+# for those emails; they are customers' accounts, not stock.
+
+PRICE_BUCKET = 1000
+MONTH_OFFSETS = (0, -1, 1)
+# Service tags people add after a contact name
+NAME_TAGS = frozenset(SERVICE_ALIASES) | {'cc', 'auto', 'autopay'}
+DIGITS = re.compile(r'\d+$')
+DETAILS_TABLE = '_transaction_notion'
+
+def match_names(name):
+    # -> (full, first) match names, '' when nothing is left
+    norm = identity_name(name)
+    if norm.startswith(UNNAMED):
+        return '', ''
+    tokens = [t for t in norm.split() if t not in NAME_TAGS and not DIGITS.match(t)]
+    if not tokens:
+        return '', ''
+    return ' '.join(tokens), tokens[0]
+
+def price_bucket(amount):
+    return int(round(abs(amount) / PRICE_BUCKET))
+
+def month_key(date, offset=0):
+    month = date.year * 12 + date.month - 1 + offset
+    return month // 12, month % 12 + 1
+
+def build_notion_index(keyed_records):
+    # keyed_records: (notion key, NotionRecord) pairs in page order
+    index = {'full': defaultdict(list), 'first': defaultdict(list), 'records': [], 'keys': [], 'used': set()}
+    for key, r in keyed_records:
+        index['keys'].append(key)
+        index['records'].append(r)
+    for pos, r in enumerate(index['records']):
+        if pd.isna(r.date):
+            continue
+        full, first = match_names(r.client)
+        if not full:
+            continue
+        year, month = month_key(r.date)
+        bucket = price_bucket(r.amount)
+        index['full'][(full, year, month, bucket)].append(pos)
+        index['first'][(first, year, month, bucket)].append(pos)
+    return index
+
+def mark_used(index, keys):
+    # Records already enriching transactions that stay in the database
+    keys = set(keys)
+    index['used'].update(pos for pos, key in enumerate(index['keys']) if key in keys)
+
+def probe(index, tx):
+    # -> position of the NotionRecord for a Treinta transaction, or None
+    if tx.amount <= 0 or pd.isna(tx.date):
+        return None
+    full, first = match_names(tx.client)
+    if not full:
+        return None
+    bucket = price_bucket(tx.amount)
+    for level, name in (('full', full), ('first', first)):
+        table = index[level]
+        for offset in MONTH_OFFSETS:
+            year, month = month_key(tx.date, offset)
+            for pos in table.get((name, year, month, bucket), ()):
+                if pos not in index['used']:
+                    index['used'].add(pos)
+                    return pos
+    return None
+
+def ensure_details_table(cursor):
+    # Rows follow their transaction out, whoever deletes it
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS "{DETAILS_TABLE}" (
+            "transaction_id" INTEGER NOT NULL PRIMARY KEY,
+            "notion_key" TEXT,
+            "email" TEXT,
+            "screens" INTEGER NOT NULL
+        )
+    ''')
+    if not has_notion_keys(cursor):
+        cursor.execute(f'ALTER TABLE "{DETAILS_TABLE}" ADD COLUMN "notion_key" TEXT')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS "{DETAILS_TABLE}_delete" AFTER DELETE ON "Transaction"
+        BEGIN DELETE FROM "{DETAILS_TABLE}" WHERE transaction_id = old.id; END
+    ''')
+
+def has_notion_keys(cursor):
+    # False for a DETAILS_TABLE written before matches were keyed (True when
+    # there is no table yet): which records its rows hold is unknown
+    cursor.execute("SELECT name FROM pragma_table_info(?)", (DETAILS_TABLE,))
+    columns = {row[0] for row in cursor.fetchall()}
+    return not columns or 'notion_key' in columns
+
+def notion_details(notion, key):
+    # -> (notion key, email, screens) to keep for a matched Notion record
+    if notion is None:
+        return None
+    return key, notion.email.lower() or None, int(notion.screens)
+
+def new_stats():
+    return {'matched': Counter(), 'unmatched': Counter(), 'service_changed': 0, 'unmatched_rows': []}
+
+def enrich(index, txs, stats, source=''):
+    # -> [(tx with the Notion service, NotionRecord or None, its key or None)],
+    # stats updated. Expenses and undated rows are not sales and are not counted.
+    out = []
+    for tx in txs:
+        pos = probe(index, tx)
+        match = key = None
+        if pos is not None:
+            match, key = index['records'][pos], index['keys'][pos]
+            stats['matched'][tx.date.year] += 1
+            if match.service != DEFAULT_SERVICE and match.service != tx.service:
+                stats['service_changed'] += 1
+                tx = tx._replace(service=match.service)
+        elif tx.amount > 0 and not pd.isna(tx.date):
+            stats['unmatched'][tx.date.year] += 1
+            stats['unmatched_rows'].append((source, tx))
+        out.append((tx, match, key))
+    return out
+
+def print_stats(index, stats, sample=10):
+    matched, unmatched = sum(stats['matched'].values()), sum(stats['unmatched'].values())
+    total = matched + unmatched
+    print(f"Notion enrichment: {matched}/{total} sales matched ({matched / total:.1%})" if total else "Notion enrichment: no sales to match")
+    for year in sorted(stats['matched'].keys() | stats['unmatched'].keys()):
+        m, u = stats['matched'][year], stats['unmatched'][year]
+        print(f"   {year}: {m} matched, {u} unmatched")
+    print(f"   {stats['service_changed']} services corrected from Notion, "
+          f"{len(index['records']) - len(index['used'])} of {len(index['records'])} Notion records unused")
+    for source, tx in stats['unmatched_rows'][:sample]:
+        print(f"   unmatched: {source} {tx.date.date()} {tx.client!r} {tx.amount:,.0f}")
@@ -0,0 +1,230 @@
+import os
+import re
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from lxml import etree
+
+from date_normalizer import MONTHS
+from parse_cache import cached_parse
+from service_classifier import detect_service
+
+# Parser for the monthly Notion HTML exports (DATOS/20xx/<Mes> <id>.html and
+# DATOS/2025/notion). Each sale is one line of a page block:
+#
+#   <summary>1 de abril Jueves</summary>
+#   <p><mark>1 net 9k Bank Lilibeth López 2 (1p) </mark><mark><a>ldz+zxc1@gmail.com</a></mark></p>
+#
+# Blocks are streamed with lxml's C parser, split into lines at <br> and
+# nested blocks, and only lines starting with a digit are run through
+# LINE_PATTERN. Inline runs that start a new entry ("2/4 yt 8k ...") split a
+# line too, since Notion often glues entries together inside one <p>.
+# Processed blocks are cleared right away, so memory stays at a few blocks
+# per page. A page that fails to parse is logged and skipped.
+
+# Same fields as TreintaRecord first, so records can go through the Treinta
+# pipeline; the Notion-only details follow.
+NotionRecord = namedtuple('NotionRecord', 'date amount client service description installment installments screens email payment')
+
+# Bump whenever parsing rules change so cached results are invalidated
+NOTION_PARSER_VERSION = 1
+
+LINE_PATTERN = re.compile(
+    r'^(?P<installment>\d+(?:/\d+)?)\s+'  # 1 or 2/3
+    r'(?P<service>\w+)\s+'                # net, spoty
+    r'(?P<price>\d+k?)\s+'                # 12k, 15000
+    r'(?P<payment>\w+)\s+'                # Bank, Nequi
+    r'(?P<name>.+?)'                      # Name (lazy)
+    r'(?:\s+\((?P<screens>\d+)p\))?'      # (1p) Optional
+    r'(?:\s+(?P<email>[\w\.\+\-]+@[\w\.\-]+\.\w+))?' # Email Optional
+    r'$',
+    re.IGNORECASE
+)
+ENTRY_START = re.compile(r'\d+(?:/\d+)?\s+\w+\s+\d+k?\s', re.IGNORECASE)
+DAY_PATTERN = re.compile(r'\s*(\d{1,2})\s+de\s+([^\W\d_]+)', re.IGNORECASE)
+LEADING_SYMBOLS = re.compile(r'^[^\w]+')
+WHITESPACE = re.compile(r'\s+')
+
+BLOCK_TAGS = frozenset(('p', 'li', 'div', 'ul', 'ol', 'details', 'summary', 'h1', 'h2', 'h3', 'table', 'tr', 'td', 'blockquote', 'figure'))
+LINE_TAGS = ('p', 'li', 'summary', 'h1', 'h2', 'h3', 'td')
+
+# Notion shorthand -> service name. Unknown tokens go through detect_service.
+NOTION_SERVICES = {
+    'NETFLIX': ('net', 'netflix', 'netglix', 'nfx'),
+    'DISNEY+': ('dis', 'disn', 'disney'),
+    'PRIME VIDEO': ('amz', 'ama', 'amaz', 'amazon', 'prime', 'primex2'),
+    'HBO MAX': ('hbo', 'hbomax', 'max'),
+    'IPTV': ('iptv',),
+    'COMBO': ('combo', 'combo1', 'comb1', 'comb2', 'comb3', 'armatucombo', 'combespc'),
+    'SPOTIFY': ('spotify', 'spoty', 'spo', 'spoti', 'spot', 'spotu', 'sporify'),
+    'YOUTUBE': ('youtube', 'yt', 'yout', 'you'),
+    'STAR+': ('star', 'stars', 'starplus'),
+    'PARAMOUNT+': ('paramount', 'param', 'par', 'parm', 'parmt'),
+    'CRUNCHYROLL': ('crunchyroll', 'crunchy', 'crunch', 'crunc'),
+    'PLEX': ('plex',),
+}
+SERVICE_ALIASES = {alias: service for service, aliases in NOTION_SERVICES.items() for alias in aliases}
+
+PARALLEL_MIN_FILES = 4
+
+def normalize_price(price):
+    # "12k" -> 12000.0, "15000" -> 15000.0
+    price = price.strip().lower()
+    if price.endswith('k'):
+        return float(price[:-1]) * 1000
+    return float(price)
+
+def normalize_installment(installment):
+    # "2/3" -> (2, 3); a bare "1" has no total -> (1, 0)
+    if '/' in installment:
+        n, total = installment.split('/', 1)
+        return int(n), int(total)
+    return int(installment), 0
+
+def normalize_service(token):
+    token = token.lower()
+    return SERVICE_ALIASES.get(token) or detect_service(token)
+
+def file_period(file_path):
+    # (year, month) from ".../2021/Abril <id>.html" or ".../2025/notion/Abril <id>.html"
+    month = MONTHS.get(os.path.basename(file_path).split(' ')[0].lower(), 1)
+    year = None
+    for part in reversed(os.path.normpath(os.path.dirname(file_path)).split(os.sep)):
+        if re.fullmatch(r'20\d{2}', part):
+            year = int(part)
+            break
+    return year, month
+
+def block_lines(element):
+    # -> list of lines, each a list of text fragments. Nested blocks end the
+    # current line and are skipped (they get their own end event).
+    lines = [[]]
+    def walk(e):
+        if e.text:
+            lines[-1].append(e.text)
+        for child in e:
+            if isinstance(child.tag, str):
+                if child.tag == 'br' or child.tag in BLOCK_TAGS:
+                    lines.append([])
+                if child.tag not in BLOCK_TAGS:
+                    walk(child)
+            if child.tail:
+                lines[-1].append(child.tail)
+    walk(element)
+    return lines
+
+def clean_line(text):
+    return LEADING_SYMBOLS.sub('', WHITESPACE.sub(' ', text).strip())
+
+def split_entries(fragments):
+    # Consecutive <mark> runs without a <br> can hold several entries; a
+    # fragment that opens a new entry starts a new segment.
+    segments = [[]]
+    for fragment in fragments:
+        if segments[-1] and ENTRY_START.match(clean_line(fragment)):
+            segments.append([])
+        segments[-1].append(fragment)
+    return segments
+
+def match_line(fragments):
+    matches = []
+    for segment in split_entries(fragments):
+        line = clean_line(''.join(segment))
+        if line[:1].isdigit():
+            m = LINE_PATTERN.match(line)
+            if m:
+                matches.append((m, line))
+    return matches
+
+def make_record(m, line, date):
+    installment, installments = normalize_installment(m.group('installment'))
+    return NotionRecord(
+        date,
+        normalize_price(m.group('price')),
+        m.group('name').strip(),
+        normalize_service(m.group('service')),
+        line,
+        installment,
+        installments,
+        int(m.group('screens')) if m.group('screens') else 0,
+        m.group('email') or '',
+        m.group('payment'),
+    )
+
+def release(element):
+    # Frees a processed line block so a page is never held whole. The tail
+    # stays: it is text of the enclosing block. Earlier siblings go too when
+    # the parent is a plain container, whose text no line block ever reads.
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None and parent.tag in BLOCK_TAGS and parent.tag not in LINE_TAGS:
+        while element.getprevious() is not None:
+            del parent[0]
+
+def parse_notion_html(file_path):
+    year, month = file_period(file_path)
+    day = 1
+    records = []
+
+    with open(file_path, 'rb') as f:
+        for _, element in etree.iterparse(f, events=('end',), tag=LINE_TAGS, html=True):
+            if element.tag == 'summary':
+                # Day toggles: "1 de abril Jueves"
+                m = DAY_PATTERN.match(''.join(element.itertext()))
+                if m:
+                    day = int(m.group(1))
+                    month = MONTHS.get(m.group(2).lower(), month)
+                release(element)
+                continue
+
+            date = None
+            for fragments in block_lines(element):
+                for m, line in match_line(fragments):
+                    if date is None:
+                        try:
+                            date = pd.Timestamp(year, month, day) if year else pd.NaT
+                        except ValueError:
+                            date = pd.NaT
+                    records.append(make_record(m, line, date))
+            release(element)
+    return records
+
+def parse_notion_cached(file_path):
+    return cached_parse(file_path, 'notion', NOTION_PARSER_VERSION, NotionRecord, parse_notion_html)
+
+def parse_notion_file(file_path):
+    # -> records, or None when the page can't be read: one malformed export
+    # is logged and skipped instead of aborting the whole run
+    try:
+        return parse_notion_cached(file_path)
+    except Exception as e:
+        print(f"⚠️ Error reading Notion page {file_path}: {e}")
+        return None
+
+def iter_notion_files(data_dir):
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith('.html'):
+                yield os.path.join(root, file)
+
+def parse_notion_files(files, workers=None):
+    # -> [(file_path, records)] in input order, pages that failed left out
+    files = list(files)
+    workers = workers or os.cpu_count() or 1
+    if len(files) < PARALLEL_MIN_FILES or workers < 2:
+        results = [(f, parse_notion_file(f)) for f in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(zip(files, pool.map(parse_notion_file, files)))
+    return [(f, records) for f, records in results if records is not None]
+
+if __name__ == '__main__':
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'DATOS'
+    total = 0
+    for file_path, records in parse_notion_files(iter_notion_files(data_dir)):
+        total += len(records)
+        print(f"{os.path.relpath(file_path, data_dir)}: {len(records)} records")
+    print(f"Total: {total} Notion records")
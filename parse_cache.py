@@ -0,0 +1,79 @@
+import os
+import hashlib
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# On-disk cache for parsed exports. The files under DATOS/ never change once
+# exported, so parse results are stored as Arrow IPC (Feather) files keyed by
+# the file's content hash and the parser's version:
+#
+#   .parse_cache/<parser>-v<version>-<sha256>.arrow
+#
+# Bumping a parser's version makes every old entry of that parser stale; they
+# are evicted the next time the parser writes to the cache.
+
+CACHE_DIR = '.parse_cache'
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cache_path(parser, version, digest):
+    return os.path.join(CACHE_DIR, f"{parser}-v{version}-{digest}.arrow")
+
+def evict_stale(parser, version):
+    if not os.path.isdir(CACHE_DIR): return 0
+    prefix = f"{parser}-v"
+    keep = f"{parser}-v{version}-"
+    removed = 0
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and not name.startswith(keep):
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+def load_records(path, record_type):
+    df = feather.read_feather(path)
+    return [record_type._make(row) for row in df.itertuples(index=False, name=None)]
+
+def store_records(path, records, record_type):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df = pd.DataFrame.from_records(records, columns=record_type._fields)
+    tmp = path + '.tmp'
+    feather.write_feather(df, tmp)
+    os.replace(tmp, path)
+
+def cached_parse(file_path, parser, version, record_type, parse_fn):
+    # parse_fn(file_path) -> list of record_type, raising when the file can't
+    # be parsed; only a successful parse is stored. Without pyarrow the cache
+    # is disabled and this is a plain call.
+    if feather is None:
+        return parse_fn(file_path)
+
+    digest = file_digest(file_path)
+    path = cache_path(parser, version, digest)
+    if os.path.exists(path):
+        try:
+            records = load_records(path, record_type)
+            print(f"   -> Cache hit for {os.path.basename(file_path)} ({len(records)} records)")
+            return records
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache entry {path}: {e}")
+
+    records = parse_fn(file_path)
+    try:
+        evict_stale(parser, version)
+        store_records(path, records, record_type)
+    except Exception as e:
+        print(f"⚠️ Could not cache {os.path.basename(file_path)}: {e}")
+    return records
@@ -0,0 +1,132 @@
+import argparse
+import sqlite3
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from advanced_migration import DATA_DIR, DB_PATH, iter_source_files
+from client_identity import load_identity_index, resolve_client_id
+from transaction_dates import epoch_ms, period_filter, period_range
+from treinta_parser import parse_treinta_excel_cached
+
+# Excel-vs-database reconciliation, one command instead of running
+# verify_excel_multisheet.py and verify_totals_by_year.py side by side:
+#
+#   python reconcile.py                     # every year, rows behind each mismatch
+#   python reconcile.py --years 2024 --limit 50
+#
+# The source side replays what advanced_migration.py would load: every export
+# under DATA_DIR through the shared parser (and its cache), client ids from
+# the database's identity index, duplicates dropped on the same natural key
+# (clienteId, fecha_inicio, monto). It is bucketed by (year, month, sign) in
+# memory and diffed against one grouped query over "Transaction". For every
+# bucket that differs, both sides are hash-joined on the natural key and the
+# rows found on only one side are listed. Months are UTC, like the loader's
+# fecha_inicio. Exits 1 when anything differs.
+
+AMOUNT_TOLERANCE = 0.5
+SIGN_NAMES = {1: 'income', -1: 'expenses'}
+
+DB_BUCKETS = '''
+    SELECT CAST(strftime('%Y', fecha_inicio / 1000, 'unixepoch') AS INTEGER) AS year,
+           CAST(strftime('%m', fecha_inicio / 1000, 'unixepoch') AS INTEGER) AS month,
+           (monto > 0) - (monto < 0) AS sign,
+           COUNT(*), SUM(monto)
+    FROM "Transaction"
+    WHERE fecha_inicio >= ? AND fecha_inicio < ?
+    GROUP BY year, month, sign
+'''
+
+def source_buckets(cursor, data_dir, years):
+    # -> {(year, month, sign): [(key, source path, TreintaRecord)]} for the given years
+    identity = load_identity_index(cursor)
+    seen = set()
+    buckets = defaultdict(list)
+    for path, rel_path, _ in iter_source_files(data_dir):
+        for tx in parse_treinta_excel_cached(path):
+            key = (resolve_client_id(identity, tx.client), epoch_ms(tx.date), tx.amount)
+            if key in seen:
+                continue
+            seen.add(key)
+            if tx.date.year in years:
+                sign = 1 if tx.amount > 0 else -1
+                buckets[(tx.date.year, tx.date.month, sign)].append((key, rel_path, tx))
+    return buckets
+
+def db_buckets(cursor, years):
+    # -> {(year, month, sign): (count, total)}, one grouped scan of the date range
+    cursor.execute(DB_BUCKETS, (period_range(min(years))[0], period_range(max(years))[1]))
+    return {(y, m, s): (n, total) for y, m, s, n, total in cursor.fetchall() if y in years}
+
+def db_rows(cursor, year, month, sign):
+    # -> [(key, id, client name)] of one bucket
+    where, params = period_filter(year, month, 't.fecha_inicio')
+    cursor.execute(f'''
+        SELECT t.clienteId, t.fecha_inicio, t.monto, t.id, c.nombre
+        FROM "Transaction" t LEFT JOIN Client c ON c.celular = t.clienteId
+        WHERE {where} AND {'t.monto > 0' if sign > 0 else 't.monto < 0'}
+    ''', params)
+    return [(row[:3], row[3], row[4]) for row in cursor.fetchall()]
+
+def unmatched(source, database):
+    # Hash join on the natural key, -> (source rows, db rows) without a partner
+    by_key = defaultdict(list)
+    for row in database:
+        by_key[row[0]].append(row)
+    only_source = []
+    for row in source:
+        partners = by_key.get(row[0])
+        if partners:
+            partners.pop()
+        else:
+            only_source.append(row)
+    only_db = [row for rows in by_key.values() for row in rows]
+    return only_source, only_db
+
+def reconcile(data_dir=None, db_path=DB_PATH, years=range(2021, 2026), limit=10):
+    # -> number of (year, month, sign) buckets that differ
+    years = set(years)
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        cursor = conn.cursor()
+        source = source_buckets(cursor, data_dir, years)
+        database = db_buckets(cursor, years)
+
+        mismatches = 0
+        for bucket in sorted(source.keys() | database.keys()):
+            year, month, sign = bucket
+            rows = source.get(bucket, [])
+            s_count, s_total = len(rows), sum(r[2].amount for r in rows)
+            d_count, d_total = database.get(bucket, (0, 0.0))
+            if s_count == d_count and abs(s_total - d_total) < AMOUNT_TOLERANCE:
+                continue
+
+            mismatches += 1
+            print(f"{year}-{month:02d} {SIGN_NAMES.get(sign, 'zero'):<8} excel {s_count:>5} ${s_total:>14,.0f} | "
+                  f"db {d_count:>5} ${d_total:>14,.0f} | diff {d_count - s_count:+d} ${d_total - s_total:+,.0f}")
+            if limit:
+                only_source, only_db = unmatched(rows, db_rows(cursor, year, month, sign))
+                for (_, _, amount), rel_path, tx in only_source[:limit]:
+                    print(f"    only in excel: {tx.date:%Y-%m-%d} {tx.client} ${amount:,.0f} ({rel_path})")
+                for (_, ts, amount), tx_id, name in only_db[:limit]:
+                    print(f"    only in db:    {datetime.fromtimestamp(ts / 1000, timezone.utc):%Y-%m-%d} {name} ${amount:,.0f} (#{tx_id})")
+                hidden = max(len(only_source) - limit, 0) + max(len(only_db) - limit, 0)
+                if hidden:
+                    print(f"    ... {hidden} more")
+
+        matched = len(source.keys() | database.keys()) - mismatches
+        print(f"\n{matched} month/sign buckets match, {mismatches} differ ({min(years)}-{max(years)})")
+        return mismatches
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f"Reconcile the Treinta exports against {DB_PATH} per month")
+    parser.add_argument('--years', type=int, nargs='+', metavar='YEAR', help="a year, or first and last year (default 2021-2025)")
+    parser.add_argument('--data-dir', default=None, help=f"exports root (default {DATA_DIR})")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--limit', type=int, default=10, help="rows listed per side of a mismatch, 0 for totals only")
+    args = parser.parse_args()
+
+    years = range(args.years[0], args.years[-1] + 1) if args.years else range(2021, 2026)
+    sys.exit(1 if reconcile(args.data_dir, args.db, years, args.limit) else 0)
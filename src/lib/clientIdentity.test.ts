@@ -0,0 +1,35 @@
+import { test } from 'node:test'
+import assert from 'node:assert/strict'
+import { UNNAMED, buildIdentityIndex, identityName, resolveClientId } from './clientIdentity'
+
+// npx tsx --test src/lib/clientIdentity.test.ts
+// test_client_identity.py checks the same cases for client_identity.py.
+
+test('transliterates letters NFKD keeps', () => {
+    assert.equal(identityName('Łukasz Ørsted'), 'lukasz orsted')
+    assert.equal(identityName('Straße'), 'strasse')
+    assert.equal(identityName('Æsa Œuvre'), 'aesa oeuvre')
+    assert.equal(identityName('Daniela García (2p)'), 'daniela garcia')
+})
+
+test('transliterated names keep their client', () => {
+    const index = buildIdentityIndex()
+    assert.equal(resolveClientId(index, 'Łukasz'), resolveClientId(index, 'lukasz'))
+    assert.notEqual(resolveClientId(index, 'Łukasz'), resolveClientId(index, 'ukasz'))
+})
+
+test('punctuation names get their own client', () => {
+    assert.equal(identityName('-'), UNNAMED + '-')
+    assert.equal(identityName(' (2p) '), UNNAMED + '(2p)')
+    const index = buildIdentityIndex()
+    const dash = resolveClientId(index, '-')
+    const dot = resolveClientId(index, '.')
+    assert.notEqual(dash, dot)
+    assert.equal(resolveClientId(index, ' - '), dash)
+    assert.ok(![dash, dot].includes(resolveClientId(index, '')))
+})
+
+test('unnamed never matches a real name', () => {
+    for (const name of ['-', '.', '(2p)', '#']) assert.ok(identityName(name).startsWith(UNNAMED))
+    for (const name of ['Daniela García', 'Łukasz', 'Straße', '1']) assert.ok(!identityName(name).includes(UNNAMED))
+})
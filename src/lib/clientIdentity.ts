@@ -0,0 +1,85 @@
+import { createHash } from 'crypto'
+
+// Deterministic client identity shared with the Python loaders
+// (client_identity.py implements the same rules, keep the two in sync).
+//
+//   identityName("Daniela García (2p)")  -> "daniela garcia"
+//   identityName("Łukasz Ørsted")        -> "lukasz orsted"
+//   identityName(" - ")                  -> "#-"
+//   clientId("daniela garcia")           -> BigInt(md5(name)) % 10^10, 10 digits
+//
+// Letters NFKD can't decompose (ł, ø, ß, æ, ...) are transliterated, not
+// dropped: TRANSLITERATION is unidecode's output for the Latin-1 and Latin
+// Extended-A ones (µ decomposes to μ), what client_identity.py gets from
+// unidecode itself; symbols stay separators on both sides. A name
+// with nothing left to compare keeps its own text behind UNNAMED, so "-" and
+// "." stay two clients and never match a real name.
+//
+// When two names land on the same ID the newcomer probes "name#1", "name#2", ...
+// so the first owner keeps it.
+
+const ID_MODULUS = BigInt('10000000000')
+const ID_DIGITS = 10
+export const UNNAMED = '#'
+
+// Lowercase letters that survive NFKD, applied after toLowerCase()
+const TRANSLITERATION: Record<string, string> = {
+    'æ': 'ae', 'ð': 'd', 'ø': 'o', 'þ': 'th', 'ß': 'ss', 'đ': 'd', 'ħ': 'h', 'ı': 'i',
+    'ĸ': 'k', 'ł': 'l', 'ŋ': 'ng', 'œ': 'oe', 'ŧ': 't', 'μ': 'm',
+}
+const UNTRANSLITERATED = new RegExp(`[${Object.keys(TRANSLITERATION).join('')}]`, 'g')
+
+export function identityName(name: string | null | undefined): string {
+    if (!name) return ""
+    const norm = String(name)
+        .replace(/\s*\(.*?\)/g, '')
+        .normalize('NFKD')
+        .replace(/[\u0300-\u036f]/g, '')
+        .toLowerCase()
+        .replace(UNTRANSLITERATED, c => TRANSLITERATION[c])
+        .replace(/[^a-z0-9]+/g, ' ')
+        .trim()
+    return norm || UNNAMED + String(name).trim().split(/\s+/).join(' ')
+}
+
+export function clientId(normName: string, attempt = 0): string {
+    const key = attempt === 0 ? normName : `${normName}#${attempt}`
+    const hex = createHash('md5').update(key, 'utf8').digest('hex')
+    return (BigInt('0x' + hex) % ID_MODULUS).toString().padStart(ID_DIGITS, '0')
+}
+
+export type ClientIdentityIndex = {
+    byName: Map<string, string>
+    byId: Map<string, string>
+    collisions: [string, string, string][]
+}
+
+// `existing` are the Client rows already in the database (celular, nombre);
+// they keep their IDs so re-imports upsert into the same rows.
+export function buildIdentityIndex(existing: { celular: string, nombre: string }[] = []): ClientIdentityIndex {
+    const index: ClientIdentityIndex = { byName: new Map(), byId: new Map(), collisions: [] }
+    for (const { celular, nombre } of existing) {
+        const norm = identityName(nombre)
+        if (!index.byId.has(celular)) index.byId.set(celular, norm)
+        if (!index.byName.has(norm)) index.byName.set(norm, celular)
+    }
+    return index
+}
+
+export function resolveClientId(index: ClientIdentityIndex, name: string | null | undefined): string {
+    const norm = identityName(name)
+    const known = index.byName.get(norm)
+    if (known !== undefined) return known
+
+    let attempt = 0
+    let id = clientId(norm)
+    while (index.byId.has(id)) {
+        index.collisions.push([norm, index.byId.get(id)!, id])
+        attempt++
+        id = clientId(norm, attempt)
+    }
+
+    index.byName.set(norm, id)
+    index.byId.set(id, norm)
+    return id
+}
@@ -1,46 +1,16 @@
 import os
-import re
 import pandas as pd
-from bs4 import BeautifulSoup
-from datetime import datetime
+import notion_parser
 
 # Configuration
 DATA_DIR = r'C:\Users\Power\Desktop\datos_migracion\2021'
 
-# Regex Pattern for Notion Lines
-PATTERN = re.compile(
-    r'^(?P<installment>\d+(?:/\d+)?)\s+'  # 1 or 2/3
-    r'(?P<service>\w+)\s+'                # net, spoty
-    r'(?P<price>\d+k?)\s+'                # 12k, 15000
-    r'(?P<payment>\w+)\s+'                # Bank, Nequi
-    r'(?P<name>.+?)'                      # Name (greedy)
-    r'(?:\s+\((?P<screens>\d+)p\))?'      # (1p) Optional
-    r'(?:\s+(?P<email>[\w\.\+\-]+@[\w\.\-]+\.\w+))?' # Email Optional
-    r'$',
-    re.IGNORECASE
-)
-
 def parse_notion_html(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
-    
-    transactions = []
     filename = os.path.basename(file_path)
-    month_str = filename.split(' ')[0].lower() # "Abril ..." -> "abril"
-    
-    print(f"   Parsing {filename} (Month: {month_str})...")
-
-    count = 0
-    for text in soup.stripped_strings:
-        match = PATTERN.match(text)
-        if match:
-            count += 1
-            data = match.groupdict()
-            # print(f"      Found: {data['name']} - {data['service']}") # Verbose
-            transactions.append(data)
-    
-    print(f"      -> Extracted {count} records.")
-    return transactions
+    print(f"   Parsing {filename} (Month: {filename.split(' ')[0].lower()})...")
+    records = notion_parser.parse_notion_html(file_path)
+    print(f"      -> Extracted {len(records)} records.")
+    return records
 
 def parse_treinta_excel(file_path):
     print(f"   Parsing Excel {os.path.basename(file_path)}...")
@@ -0,0 +1,30 @@
+from client_identity import UNNAMED, identity_name, new_identity_index, resolve_client_id
+
+# python -m pytest test_client_identity.py
+# src/lib/clientIdentity.test.ts checks the same cases for import_json.ts.
+
+def test_transliterates_letters_nfkd_keeps():
+    assert identity_name("Łukasz Ørsted") == "lukasz orsted"
+    assert identity_name("Straße") == "strasse"
+    assert identity_name("Æsa Œuvre") == "aesa oeuvre"
+    assert identity_name("Daniela García (2p)") == "daniela garcia"
+
+def test_transliterated_names_keep_their_client():
+    index = new_identity_index()
+    assert resolve_client_id(index, "Łukasz") == resolve_client_id(index, "lukasz")
+    assert resolve_client_id(index, "Łukasz") != resolve_client_id(index, "ukasz")
+
+def test_punctuation_names_get_their_own_client():
+    assert identity_name("-") == UNNAMED + "-"
+    assert identity_name(" (2p) ") == UNNAMED + "(2p)"
+    index = new_identity_index()
+    dash, dot = resolve_client_id(index, "-"), resolve_client_id(index, ".")
+    assert dash != dot
+    assert resolve_client_id(index, " - ") == dash
+    assert resolve_client_id(index, "") not in (dash, dot)
+
+def test_unnamed_never_matches_a_real_name():
+    for name in ("-", ".", "(2p)", "#"):
+        assert identity_name(name).startswith(UNNAMED)
+    for name in ("Daniela García", "Łukasz", "Straße", "1"):
+        assert UNNAMED not in identity_name(name)
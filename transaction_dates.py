@@ -0,0 +1,67 @@
+import pandas as pd
+from date_normalizer import parse_date
+
+# Canonical storage for the "Transaction" date columns: INTEGER epoch
+# milliseconds in UTC, what Prisma itself writes for DateTime on SQLite and
+# what advanced_migration.py loads. Python writers go through epoch_ms();
+# normalize_dates() rewrites rows that some other path stored as text
+# ("2021-08-02", "2021-08-02T00:00:00.000Z", "2021-08-02 00:00:00").
+#
+# Year/month filters must be ranges on the raw column so the fecha_inicio
+# index is used:
+#
+#   where, params = period_filter(2021, 1)
+#   cursor.execute(f'SELECT COUNT(*) FROM "Transaction" WHERE {where}', params)
+#
+# never strftime(fecha_inicio) or fecha_inicio LIKE '2021%'.
+
+DATE_COLUMNS = ('fecha_inicio', 'fecha_vencimiento')
+DATE_INDEX = 'Transaction_fecha_inicio_idx' # SQLite-only, created by the loader, not in schema.prisma
+
+def epoch_ms(value):
+    # Timestamp / datetime / date string / epoch ms -> int epoch ms (UTC), None if not a date
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value) if value == value else None
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+        # ISO with a T (JS toISOString) is parsed as such, never day-first
+        ts = pd.to_datetime(value, utc=True, errors='coerce') if 'T' in value else parse_date(value)
+    else:
+        ts = parse_date(value)
+    if ts is None or pd.isna(ts):
+        return None
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return int(ts.value // 10**6)
+
+def period_range(year, month=None):
+    # -> [start, end) in epoch ms for a year or one month of it
+    start = pd.Timestamp(year, month or 1, 1)
+    end = start + (pd.DateOffset(months=1) if month else pd.DateOffset(years=1))
+    return epoch_ms(start), epoch_ms(end)
+
+def period_filter(year, month=None, column='fecha_inicio'):
+    # -> (SQL predicate, params), sargable on `column`
+    return f'{column} >= ? AND {column} < ?', period_range(year, month)
+
+def ensure_date_index(cursor):
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS "{DATE_INDEX}" ON "Transaction"("fecha_inicio")')
+
+def normalize_dates(cursor):
+    # Rewrites non-integer dates as epoch ms, -> (rows fixed, [(id, column, value)] left as is)
+    fixed, bad = 0, []
+    for column in DATE_COLUMNS:
+        cursor.execute(f'SELECT id, {column} FROM "Transaction" WHERE typeof({column}) != \'integer\'')
+        updates = []
+        for tx_id, value in cursor.fetchall():
+            ms = epoch_ms(value)
+            if ms is None:
+                bad.append((tx_id, column, value))
+            else:
+                updates.append((ms, tx_id))
+        cursor.executemany(f'UPDATE "Transaction" SET {column} = ? WHERE id = ?', updates)
+        fixed += len(updates)
+    return fixed, bad
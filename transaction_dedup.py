@@ -0,0 +1,65 @@
+from transaction_dates import epoch_ms
+
+# Duplicate handling for "Transaction" on its natural key (clienteId,
+# fecha_inicio, monto): two sales to the same client on the same day for the
+# same amount are the same sale exported twice.
+#
+# advanced_migration.py drops duplicates while loading (a seen-set seeded with
+# the keys of the rows that stay in the table), before the Notion pass, so the
+# table stays clean, a dropped copy never uses up a Notion record and the
+# first row loaded wins, like the old "keep MIN(id)" cleanup. The composite index makes
+# the report and the cleanup of rows added outside the loader index-only.
+
+NATURAL_KEY_INDEX = 'Transaction_clienteId_fecha_inicio_monto_idx' # SQLite-only, created by the loader, not in schema.prisma
+
+def ensure_natural_key_index(cursor):
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS "{NATURAL_KEY_INDEX}" ON "Transaction"("clienteId", "fecha_inicio", "monto")')
+
+def load_natural_keys(cursor, skip_ranges=()):
+    # Keys in the table, leaving out rows whose id is in one of the
+    # (first, last) ranges about to be rolled back. Dates stored as text are
+    # keyed as the epoch ms normalize_dates() will turn them into.
+    cursor.execute('SELECT id, clienteId, fecha_inicio, monto FROM "Transaction"')
+    return {(cid, epoch_ms(fecha), monto) for tx_id, cid, fecha, monto in cursor.fetchall()
+            if not any(first <= tx_id <= last for first, last in skip_ranges)}
+
+def dedupe_rows(rows, seen, key):
+    # -> (rows whose key(row) is not in seen, number dropped); seen is updated.
+    # A None key (nothing to compare) always passes.
+    kept = []
+    for row in rows:
+        k = key(row)
+        if k is None:
+            kept.append(row)
+        elif k not in seen:
+            seen.add(k)
+            kept.append(row)
+    return kept, len(rows) - len(kept)
+
+def duplicate_report(cursor, limit=20):
+    # -> (top `limit` groups as (fecha_inicio, clienteId, monto, count), groups, extra rows)
+    ensure_natural_key_index(cursor)
+    cursor.execute('''
+        SELECT fecha_inicio, clienteId, monto, COUNT(*) AS count
+        FROM "Transaction"
+        GROUP BY clienteId, fecha_inicio, monto
+        HAVING count > 1
+    ''')
+    groups = cursor.fetchall()
+    groups.sort(key=lambda g: g[3], reverse=True)
+    return groups[:limit], len(groups), sum(g[3] - 1 for g in groups)
+
+def delete_duplicates(cursor):
+    # Keeps the lowest id of every natural key, -> rows deleted
+    ensure_natural_key_index(cursor)
+    cursor.execute('''
+        DELETE FROM "Transaction"
+        WHERE EXISTS (
+            SELECT 1 FROM "Transaction" AS first
+            WHERE first.clienteId = "Transaction".clienteId
+              AND first.fecha_inicio = "Transaction".fecha_inicio
+              AND first.monto = "Transaction".monto
+              AND first.id < "Transaction".id
+        )
+    ''')
+    return cursor.rowcount
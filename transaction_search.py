@@ -0,0 +1,159 @@
+import argparse
+import sqlite3
+import sys
+
+from derived_tables import derived_ready, ensure_derived
+from transaction_dates import period_range
+
+# Full-text index over each transaction's client name and description
+# (SQLite FTS5), for keyword and word-frequency questions such as "which
+# sales look like hidden expenses".
+#
+# Matching is on whole tokens with accents folded, so "gas" does not hit
+# "Vargas" and "comision" finds "Comisión"; `impuesto*` is a prefix query.
+# The rowid is the transaction id. Triggers keep it current (see
+# derived_tables.py): transactions are indexed, re-indexed and dropped as
+# they are written, and a client's rows are re-indexed when it is renamed.
+#
+# The index is built by advanced_migration.py or by
+# python transaction_search.py --rebuild, never by a query: search() and
+# term_frequencies() raise RuntimeError on a database without it.
+
+DB_PATH = 'prisma/dev.db'
+TEXT_TABLE = '_transaction_text'
+TERMS_TABLE = '_transaction_text_terms' # fts5vocab: one row per token occurrence
+
+# Keyword -> FTS5 query. Words that are also first names only count next to
+# a billing word, so "Luz Maria" is a client and "Pago luz" an expense.
+BILLING_WORDS = '(pago OR recibo OR factura OR servicio OR servicios)'
+SUSPICIOUS_KEYWORDS = {
+    'pago': 'pago',
+    'cancel': 'cancel*',
+    'nomina': 'nomina',
+    'arriendo': 'arriendo',
+    'servicios': 'servicios',
+    'luz': f'luz AND {BILLING_WORDS}',
+    'agua': 'agua',
+    'gas': 'gas',
+    'internet': 'internet',
+    'plan': 'plan',
+    'comision': 'comision*',
+    'impuesto': 'impuesto*',
+    'retencion': 'retencion*',
+    'proveedor': 'proveedor*',
+    'suscripcion': 'suscripcion*',
+    'mensualidad': 'mensualidad*',
+}
+
+INDEX_ROWS = '''
+    SELECT t.id, COALESCE(c.nombre, ''), COALESCE(t.descripcion, '')
+    FROM "Transaction" t LEFT JOIN Client c ON c.celular = t.clienteId
+'''
+
+INDEX_NEW = f'''
+    INSERT INTO "{TEXT_TABLE}" (rowid, nombre, descripcion)
+    VALUES (new.id, COALESCE((SELECT nombre FROM Client WHERE celular = new.clienteId), ''), COALESCE(new.descripcion, ''));
+'''
+UNINDEX_OLD = f'DELETE FROM "{TEXT_TABLE}" WHERE rowid = old.id;'
+REINDEX_CLIENT = f'''
+    DELETE FROM "{TEXT_TABLE}" WHERE rowid IN (SELECT id FROM "Transaction" WHERE clienteId = new.celular);
+    INSERT INTO "{TEXT_TABLE}" (rowid, nombre, descripcion)
+    SELECT id, new.nombre, COALESCE(descripcion, '') FROM "Transaction" WHERE clienteId = new.celular;
+'''
+
+TEXT_TRIGGERS = {
+    f'{TEXT_TABLE}_insert': f'CREATE TRIGGER "{TEXT_TABLE}_insert" AFTER INSERT ON "Transaction" BEGIN {INDEX_NEW} END',
+    f'{TEXT_TABLE}_delete': f'CREATE TRIGGER "{TEXT_TABLE}_delete" AFTER DELETE ON "Transaction" BEGIN {UNINDEX_OLD} END',
+    f'{TEXT_TABLE}_update': f'CREATE TRIGGER "{TEXT_TABLE}_update" AFTER UPDATE OF clienteId, descripcion ON "Transaction" BEGIN {UNINDEX_OLD} {INDEX_NEW} END',
+    f'{TEXT_TABLE}_client': f'CREATE TRIGGER "{TEXT_TABLE}_client" AFTER UPDATE OF nombre ON Client BEGIN {REINDEX_CLIENT} END',
+}
+
+def fill_text_index(cursor):
+    cursor.execute(f'DELETE FROM "{TEXT_TABLE}"')
+    cursor.execute(f'INSERT INTO "{TEXT_TABLE}" (rowid, nombre, descripcion) ' + INDEX_ROWS)
+
+def ensure_text_index(cursor):
+    ensure_derived(cursor, [
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS "{TEXT_TABLE}" USING fts5(
+            nombre, descripcion, tokenize = 'unicode61 remove_diacritics 2'
+        )
+        ''',
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS "{TERMS_TABLE}" USING fts5vocab("{TEXT_TABLE}", instance)',
+    ], TEXT_TRIGGERS, fill_text_index)
+
+def rebuild_text_index(cursor):
+    ensure_text_index(cursor)
+    fill_text_index(cursor)
+
+def require_text_index(cursor):
+    if not derived_ready(cursor, TEXT_TABLE, TEXT_TRIGGERS):
+        raise RuntimeError(f"{TEXT_TABLE} is missing or out of date, build it with "
+                           "python transaction_search.py --rebuild (or a load with advanced_migration.py)")
+
+def period_clause(first_year, last_year, sign):
+    clauses, params = [], []
+    if first_year is not None:
+        start, end = period_range(first_year)[0], period_range(last_year or first_year)[1]
+        clauses.append('t.fecha_inicio >= ? AND t.fecha_inicio < ?')
+        params += [start, end]
+    if sign is not None:
+        clauses.append('t.monto > 0' if sign > 0 else 't.monto < 0')
+    return ''.join(f' AND {c}' for c in clauses), params
+
+def search(cursor, query, first_year=None, last_year=None, sign=None):
+    # -> [(id, nombre, descripcion, monto, fecha_inicio)] matching an FTS5 query
+    require_text_index(cursor)
+    where, params = period_clause(first_year, last_year, sign)
+    cursor.execute(f'''
+        SELECT t.id, x.nombre, x.descripcion, t.monto, t.fecha_inicio
+        FROM "{TEXT_TABLE}" x JOIN "Transaction" t ON t.id = x.rowid
+        WHERE "{TEXT_TABLE}" MATCH ?{where}
+    ''', [query] + params)
+    return cursor.fetchall()
+
+def term_frequencies(cursor, first_year=None, last_year=None, sign=None, min_length=4, limit=20):
+    # -> [(term, occurrences)] most frequent tokens in the period
+    require_text_index(cursor)
+    where, params = period_clause(first_year, last_year, sign)
+    cursor.execute(f'''
+        SELECT v.term, COUNT(*) AS n
+        FROM "{TERMS_TABLE}" v JOIN "Transaction" t ON t.id = v.doc
+        WHERE length(v.term) >= ?{where}
+        GROUP BY v.term ORDER BY n DESC, v.term LIMIT ?
+    ''', [min_length] + params + [limit])
+    return cursor.fetchall()
+
+def hidden_expenses(cursor, first_year=None, last_year=None):
+    # -> [(keyword, id, nombre, descripcion, monto)] income rows that match a
+    # suspicious keyword, largest first; a row is listed under its first keyword
+    seen, found = set(), []
+    for keyword, query in SUSPICIOUS_KEYWORDS.items():
+        for tx_id, nombre, descripcion, monto, _ in search(cursor, query, first_year, last_year, sign=1):
+            if tx_id not in seen:
+                seen.add(tx_id)
+                found.append((keyword, tx_id, nombre, descripcion, monto))
+    found.sort(key=lambda r: r[4], reverse=True)
+    return found
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=f"Keyword search over {DB_PATH} transactions")
+    parser.add_argument('query', nargs='?', help="FTS5 query, e.g. 'arriendo OR nomina'")
+    parser.add_argument('--years', type=int, nargs='+', metavar='YEAR', help="a year, or first and last year")
+    parser.add_argument('--rebuild', action='store_true', help=f"rebuild {TEXT_TABLE} from every transaction")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    if args.rebuild:
+        rebuild_text_index(cursor)
+        conn.commit()
+    years = (args.years or [None])[0], (args.years or [None])[-1]
+    try:
+        if args.query:
+            for tx_id, nombre, descripcion, monto, _ in search(cursor, args.query, *years):
+                print(f"{tx_id}: {nombre} | {descripcion} : ${monto:,.0f}")
+    except RuntimeError as e:
+        sys.exit(str(e))
+    finally:
+        conn.close()
@@ -0,0 +1,359 @@
+import os
+import re
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+import unidecode
+from openpyxl import load_workbook
+from date_normalizer import parse_date
+from parse_cache import cached_parse
+from service_classifier import detect_service
+
+try:
+    from xlsx_reader import XlsxWorkbook
+except ImportError: # lxml missing, stay on openpyxl
+    XlsxWorkbook = None
+
+# Shared Treinta export parser. advanced_migration, export_history,
+# extract_services, debug_excel_dates and verify_excel_multisheet all read the
+# workbooks through here so every script gives the same answers.
+
+# One parsed money row. `amount` is signed (expenses negative), the caller adds
+# source/year or whatever else its output format needs.
+TreintaRecord = namedtuple('TreintaRecord', 'date amount client service description')
+
+# Bump whenever parsing rules change so cached results are invalidated
+PARSER_VERSION = 3
+
+HEADER_SNIFF_ROWS = 20
+
+# Checked in order, first hit wins (a merged "Fecha Tipo Vendedor ..." cell is a date column)
+COLUMN_PATTERNS = (
+    ('date', re.compile(r'fecha')),
+    ('client', re.compile(r'contacto|cliente')), # Prefer Contacto/Cliente
+    ('amount', re.compile(r'valor|monto')),
+    ('type', re.compile(r'tipo')),
+    ('desc', re.compile(r'descripci')),
+    # NOTE: explicitly ignoring "vendedor" to avoid capturing seller name
+)
+
+FALLBACK_RE = re.compile(r'(?:(\d{2}/\d{2}/\d{4})|(\d{4}-\d{2}-\d{2}))\s+(?:(?:\S+)\s+)?(.*?)\s+(\d+(?:\.\d+)?)\s*$')
+EXPENSE_RE = re.compile(r'gasto|egreso|compra', re.IGNORECASE)
+VOID_RE = re.compile(r'anulad[oa]', re.IGNORECASE)
+
+ROW_BLANK, ROW_VOID, ROW_HEADER, ROW_DATA = 'blank', 'void', 'header', 'data'
+
+# Small workbooks (the 2-sheet Hoja1/Hoja2 exports) are parsed serially, pool
+# startup would dominate. Every worker pays a full workbook open (shared strings
+# + styles), so each worker gets exactly one contiguous sheet range.
+PARALLEL_MIN_SHEETS = 50
+
+def normalize_name(name):
+    if not name: return ""
+    name = re.sub(r'\s*\(.*?\)', '', str(name))
+    try:
+        norm = unidecode.unidecode(name).lower().strip()
+    except:
+        norm = str(name).lower().strip()
+    return norm
+
+def join_row(row):
+    return " ".join([str(x) for x in row if x is not None])
+
+def is_header_row(row):
+    row_str = join_row(row)
+    return "Fecha" in row_str and "Tipo" in row_str
+
+def sniff_header(rows_iter):
+    rows_buffer = []
+    header_row_idx = None
+
+    # Buffer first few rows to sniff header
+    for i in range(HEADER_SNIFF_ROWS):
+        try:
+            row = next(rows_iter)
+        except StopIteration:
+            break
+        rows_buffer.append(row)
+        if is_header_row(row):
+            header_row_idx = i
+            break
+    return rows_buffer, header_row_idx
+
+@lru_cache(maxsize=None)
+def build_col_map(header):
+    # Header rows repeat on every page of the PDF-converted exports, so the
+    # map is computed once per distinct header tuple. Do not mutate the result.
+    col_map = {}
+    for c_idx, val in enumerate(header):
+        val_str = str(val).lower() if val else ""
+        for key, pattern in COLUMN_PATTERNS:
+            if pattern.search(val_str):
+                col_map[key] = c_idx
+                break
+    return col_map
+
+def has_money_columns(col_map):
+    return 'date' in col_map and 'amount' in col_map
+
+def classify_row(row, col_map):
+    # One pass over the typed cells -> (kind, joined row, is_expense). The
+    # joined string is built once and reused by the fallback regex and the
+    # service detection.
+    row_str = join_row(row)
+    if not row_str.strip():
+        return ROW_BLANK, row_str, False
+
+    # Voided rows never produce a record, whichever path parses them
+    if VOID_RE.search(row_str):
+        return ROW_VOID, row_str, False
+
+    # A repeated header: its date cell can't parse as a date
+    if "Fecha" in row_str and "Tipo" in row_str and 'date' in col_map:
+        try:
+            date_cell = row[col_map['date']]
+        except IndexError:
+            date_cell = None
+        if isinstance(date_cell, str) and "Fecha" in date_cell and not FALLBACK_RE.search(row_str):
+            return ROW_HEADER, row_str, False
+
+    return ROW_DATA, row_str, EXPENSE_RE.search(row_str) is not None
+
+def parse_rows(rows, col_map, records):
+    money_columns = has_money_columns(col_map)
+    for row in rows:
+        try:
+            kind, val_str_full, is_expense = classify_row(row, col_map)
+            if kind != ROW_DATA:
+                continue
+
+            # 1. OPTIMISTIC: Standard Column Extraction
+            date_val = None
+            amount = 0
+            tx_type = "Venta"
+            client = "Unknown"
+            desc = "GENERICO"
+
+            valid_standard = False
+            try:
+                if money_columns:
+                    date_raw = row[col_map['date']]
+                    amount_raw = row[col_map['amount']]
+
+                    if isinstance(date_raw, (datetime, pd.Timestamp)):
+                        date_val = date_raw
+                        valid_standard = True
+                    elif isinstance(date_raw, str):
+                         date_val = parse_date(date_raw)
+                         valid_standard = date_val is not None
+
+                    if valid_standard:
+                        try:
+                            amount = float(amount_raw)
+                            client = row[col_map.get('client', 2)]
+                            tx_type = row[col_map['type']] if 'type' in col_map else "Venta"
+                            desc = row[col_map['desc']] if 'desc' in col_map else ""
+
+                            if is_expense:
+                                tx_type = "Gasto"
+                        except:
+                            valid_standard = False
+            except:
+                valid_standard = False
+
+            # 2. FALLBACK: precompiled regex on the joined row, only when the
+            # structured columns gave nothing usable
+            if not valid_standard or amount == 0:
+                regex_match = FALLBACK_RE.search(val_str_full)
+                if regex_match:
+                    d_str = regex_match.group(1) if regex_match.group(1) else regex_match.group(2)
+                    date_val = parse_date(d_str, dayfirst=(regex_match.group(1) is not None))
+
+                    client = regex_match.group(3).strip()
+                    amount = float(regex_match.group(4))
+                    tx_type = "Gasto" if is_expense else "Venta"
+                    desc = val_str_full # Use full row as description for fallback
+
+                    valid_standard = True
+
+            if not valid_standard or pd.isna(date_val): continue
+
+            # Handle Expenses
+            if str(tx_type).lower() == 'gasto':
+                amount = -abs(amount)
+
+            if abs(amount) > 100000000: continue
+            if amount == 0: continue
+
+            # SERVICE DETECTION
+            service_detected = detect_service(desc if desc else val_str_full)
+            if service_detected == 'GENERICO':
+                # Try detecting from full row if desc was empty
+                service_detected = detect_service(val_str_full)
+
+            records.append(TreintaRecord(
+                date_val,
+                amount,
+                str(client) if client else 'Unknown',
+                service_detected,
+                str(desc) if desc else "",
+            ))
+        except Exception:
+            continue
+
+def chain_rows(rows_buffer, rows_iter):
+    for r in rows_buffer: yield r
+    for r in rows_iter: yield r
+
+def open_workbook(file_path):
+    # Streaming XML reader when available: same rows as openpyxl read-only,
+    # without the per-sheet setup that dominates the 3000-sheet exports
+    if XlsxWorkbook is not None:
+        return XlsxWorkbook(file_path)
+    return load_workbook(file_path, read_only=True, data_only=True)
+
+def count_sheets(file_path):
+    # Read workbook.xml directly, load_workbook costs seconds on the 3000-sheet exports
+    with zipfile.ZipFile(file_path) as zf:
+        return len(re.findall(rb'<(?:\w+:)?sheet\b', zf.read('xl/workbook.xml')))
+
+def iter_treinta_sheets(file_path):
+    # Yields each sheet's records as soon as the sheet is parsed, for writers
+    # that stream (export_history.py --ndjson). Raises when the workbook can't
+    # be opened; a sheet that fails to parse yields nothing.
+    wb = open_workbook(file_path)
+    try:
+        sheet_names = wb.sheetnames
+        print(f"   -> Found {len(sheet_names)} sheets in {os.path.basename(file_path)}")
+
+        last_valid_col_map = None
+
+        for idx, sheet_name in enumerate(sheet_names):
+             if idx % 200 == 0:
+                print(f"      Scanning sheet {idx}/{len(sheet_names)}...", end='\r', flush=True)
+
+             records = []
+             try:
+                ws = wb[sheet_name]
+                rows_iter = ws.iter_rows(values_only=True)
+                rows_buffer, header_row_idx = sniff_header(rows_iter)
+
+                col_map = {}
+                data_rows_source = []
+
+                if header_row_idx is not None:
+                     # 1. FOUND HEADER -> New Map
+                     col_map = build_col_map(rows_buffer[header_row_idx])
+
+                     if has_money_columns(col_map):
+                         last_valid_col_map = col_map
+                         data_rows_source = rows_buffer[header_row_idx+1:]
+
+                elif last_valid_col_map is not None:
+                     # 2. NO HEADER -> Inherit Map
+                     if rows_buffer:
+                         col_map = last_valid_col_map
+                         data_rows_source = rows_buffer
+
+                if has_money_columns(col_map):
+                     parse_rows(chain_rows(data_rows_source, rows_iter), col_map, records)
+             except Exception:
+                 pass
+             if records:
+                 yield records
+    finally:
+        wb.close()
+
+def parse_treinta_excel(file_path):
+    # Raises when the workbook can't be read: an empty result must mean an
+    # empty export, never a failed read (it would be cached as such)
+    records = []
+    for sheet_records in iter_treinta_sheets(file_path):
+        records.extend(sheet_records)
+    return records
+
+def parse_sheet_range(file_path, start, stop):
+    # Worker side of parse_treinta_excel_parallel. The column map inherited
+    # from sheets before `start` is unknown here, so headerless sheets that
+    # precede the first valid header of the range are returned raw (deferred)
+    # and parsed by the parent once the inherited map is resolved.
+    records = []
+    deferred = []
+    range_col_map = None
+
+    wb = open_workbook(file_path)
+    sheet_names = wb.sheetnames[start:stop]
+    for sheet_name in sheet_names:
+         try:
+            ws = wb[sheet_name]
+            rows_iter = ws.iter_rows(values_only=True)
+            rows_buffer, header_row_idx = sniff_header(rows_iter)
+
+            col_map = {}
+            data_rows_source = []
+
+            if header_row_idx is not None:
+                 col_map = build_col_map(rows_buffer[header_row_idx])
+
+                 if has_money_columns(col_map):
+                     range_col_map = col_map
+                     data_rows_source = rows_buffer[header_row_idx+1:]
+
+            elif range_col_map is not None:
+                 if rows_buffer:
+                     col_map = range_col_map
+                     data_rows_source = rows_buffer
+
+            elif rows_buffer:
+                 # No header seen yet in this range -> depends on the previous range
+                 rows = []
+                 deferred.append(rows)
+                 for r in chain_rows(rows_buffer, rows_iter): rows.append(r)
+                 continue
+
+            if has_money_columns(col_map):
+                 parse_rows(chain_rows(data_rows_source, rows_iter), col_map, records)
+         except Exception:
+             pass
+
+    wb.close()
+    return deferred, records, range_col_map
+
+def parse_treinta_excel_parallel(file_path, workers=None):
+    # Raises like parse_treinta_excel, also when the pool breaks (a worker
+    # killed for memory): a partial merge would silently drop sheet ranges
+    n_sheets = count_sheets(file_path)
+
+    workers = workers or os.cpu_count() or 1
+    if n_sheets < PARALLEL_MIN_SHEETS or workers < 2:
+        return parse_treinta_excel(file_path)
+
+    step = -(-n_sheets // workers)
+    bounds = [(s, min(s + step, n_sheets)) for s in range(0, n_sheets, step)]
+    print(f"   -> Found {n_sheets} sheets in {os.path.basename(file_path)} ({len(bounds)} ranges on {workers} workers)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(parse_sheet_range, file_path, s, e) for s, e in bounds]
+        results = [f.result() for f in futures]
+
+    # Ordered merge: carry last_valid_col_map across range boundaries exactly
+    # like the serial walk does.
+    records = []
+    last_valid_col_map = None
+    for deferred, range_records, range_col_map in results:
+        if last_valid_col_map is not None:
+            for rows in deferred:
+                parse_rows(rows, last_valid_col_map, records)
+        records.extend(range_records)
+        if range_col_map is not None:
+            last_valid_col_map = range_col_map
+
+    return records
+
+def parse_treinta_excel_cached(file_path, workers=None):
+    return cached_parse(file_path, 'treinta', PARSER_VERSION, TreintaRecord,
+                        lambda path: parse_treinta_excel_parallel(path, workers))
@@ -1,5 +1,6 @@
 
 import sqlite3
+from monthly_totals import yearly_totals
 
 DB_PATH = 'prisma/dev.db'
 
@@ -8,12 +9,10 @@ def check_years():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
-    years = ['2021', '2022', '2023', '2024', '2025']
+    years = [2021, 2022, 2023, 2024, 2025]
     
-    for y in years:
-        cursor.execute(f"SELECT COUNT(*) FROM 'Transaction' WHERE fecha_inicio LIKE '{y}%'")
-        count = cursor.fetchone()[0]
-        print(f"Year {y}: {count} transactions")
+    for y, totals in yearly_totals(cursor, years).items():
+        print(f"Year {y}: {totals[3]} transactions")
 
     conn.close()
 
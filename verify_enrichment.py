@@ -27,6 +27,17 @@ def check_enrichment():
     else:
         print("⚠ No enriched profiles found (Everything is GENERICO?).")
 
+    # Sales joined to a Notion line keep it in descripcion; account email and
+    # screens sold are in the _transaction_notion side table
+    cursor.execute('''
+        SELECT COUNT(t.descripcion), COUNT(n.email), SUM(n.screens), COUNT(*)
+        FROM 'Transaction' t
+        LEFT JOIN _transaction_notion n ON n.transaction_id = t.id
+        WHERE t.monto > 0
+    ''')
+    notion, with_account, screens, sales = cursor.fetchone()
+    print(f"\nSales matched to Notion: {notion}/{sales} ({with_account} with an account email, {screens or 0} screens)")
+
     # Check for 0-value operational records
     cursor.execute("SELECT COUNT(*) FROM 'Transaction' WHERE monto = 0")
     zero_count = cursor.fetchone()[0]
@@ -1,6 +1,6 @@
 
 import sqlite3
-from datetime import datetime
+from monthly_totals import yearly_totals
 
 def check_totals():
     try:
@@ -11,21 +11,8 @@ def check_totals():
         print(f"{'Year':<6} | {'Income (Ingresos)':<20} | {'Expenses (Egresos)':<20} | {'Balance (Utilidad)':<20} | {'Tx Count':<10}")
         print("-" * 100)
 
-        for year in range(2021, 2026):
-            start_ts = int(datetime(year, 1, 1).timestamp() * 1000)
-            end_ts = int(datetime(year + 1, 1, 1).timestamp() * 1000)
-
-            cursor.execute("""
-                SELECT 
-                    SUM(CASE WHEN monto > 0 THEN monto ELSE 0 END) as income,
-                    SUM(CASE WHEN monto < 0 THEN monto ELSE 0 END) as expenses,
-                    SUM(monto) as balance,
-                    COUNT(*) as count
-                FROM "Transaction" 
-                WHERE fecha_inicio >= ? AND fecha_inicio < ?
-            """, (start_ts, end_ts))
-            
-            row = cursor.fetchone()
+        # One read of the monthly aggregates for all years (monthly_totals.py)
+        for year, row in yearly_totals(cursor, range(2021, 2026)).items():
             income = row[0] if row[0] else 0
             expenses = row[1] if row[1] else 0
             balance = row[2] if row[2] else 0
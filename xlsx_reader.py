@@ -0,0 +1,220 @@
+import posixpath
+import zipfile
+
+from lxml import etree
+from openpyxl.cell.text import Text
+from openpyxl.reader.strings import read_string_table
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.utils.datetime import from_excel, from_ISO8601, WINDOWS_EPOCH, CALENDAR_MAC_1904
+
+# Lean read-only XLSX reader for the Treinta exports.
+#
+# Same surface as openpyxl's load_workbook(path, read_only=True, data_only=True)
+# for what the parsers use: wb.sheetnames, wb[name].iter_rows(values_only=True)
+# and wb.close(), yielding the same tuples (padding to the sheet dimension,
+# blank rows for gaps, date-styled serials as datetimes). The difference is
+# the cost: shared strings and styles are read once per workbook, each sheet's
+# XML is streamed once with lxml (openpyxl parses it twice, once just for the
+# dimension) and cells become plain values, no cell objects.
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+ROW_TAG = f'{NS}row'
+DIMENSION_TAG = f'{NS}dimension'
+VALUE_TAG = f'{NS}v'
+INLINE_STRING = f'{NS}is'
+
+DIGITS = '0123456789'
+_column_cache = {}
+
+def column_index(letters):
+    idx = _column_cache.get(letters)
+    if idx is None:
+        idx = 0
+        for ch in letters:
+            idx = idx * 26 + ord(ch) - 64
+        _column_cache[letters] = idx
+    return idx
+
+def cast_number(value):
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+def resolve_target(target):
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join('xl', target))
+
+class XlsxWorkbook:
+
+    def __init__(self, path):
+        self._archive = zipfile.ZipFile(path)
+        names = set(self._archive.namelist())
+
+        rels = {}
+        shared_path = styles_path = None
+        for rel in etree.fromstring(self._archive.read('xl/_rels/workbook.xml.rels')).iter(f'{PKG_REL_NS}Relationship'):
+            target = resolve_target(rel.get('Target'))
+            rels[rel.get('Id')] = target
+            rel_type = rel.get('Type', '')
+            if rel_type.endswith('/sharedStrings'):
+                shared_path = target
+            elif rel_type.endswith('/styles'):
+                styles_path = target
+
+        workbook = etree.fromstring(self._archive.read('xl/workbook.xml'))
+        pr = workbook.find(f'{NS}workbookPr')
+        self.epoch = CALENDAR_MAC_1904 if pr is not None and pr.get('date1904') in ('1', 'true') else WINDOWS_EPOCH
+
+        self._sheets = {}
+        for sheet in workbook.iter(f'{NS}sheet'):
+            target = rels.get(sheet.get(f'{REL_NS}id'))
+            if target in names:
+                self._sheets[sheet.get('name')] = target
+        self.sheetnames = list(self._sheets)
+
+        self.shared_strings = []
+        if shared_path in names:
+            with self._archive.open(shared_path) as src:
+                self.shared_strings = read_string_table(src)
+
+        self.date_formats = set()
+        self.timedelta_formats = set()
+        if styles_path in names:
+            self._read_number_formats(etree.fromstring(self._archive.read(styles_path)))
+
+    def _read_number_formats(self, styles):
+        # Index the cellXfs entries whose number format is a date/time, like
+        # openpyxl's Stylesheet._normalise_numbers
+        custom = {}
+        num_fmts = styles.find(f'{NS}numFmts')
+        if num_fmts is not None:
+            for fmt in num_fmts.iter(f'{NS}numFmt'):
+                custom[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+
+        cell_xfs = styles.find(f'{NS}cellXfs')
+        if cell_xfs is None:
+            return
+        for idx, xf in enumerate(cell_xfs.findall(f'{NS}xf')):
+            fmt_id = int(xf.get('numFmtId', 0))
+            fmt = custom[fmt_id] if fmt_id in custom else BUILTIN_FORMATS.get(fmt_id)
+            if is_date_format(fmt):
+                self.date_formats.add(idx)
+            if is_timedelta_format(fmt):
+                self.timedelta_formats.add(idx)
+
+    def __getitem__(self, name):
+        return XlsxSheet(self, name, self._sheets[name])
+
+    def close(self):
+        self._archive.close()
+
+class XlsxSheet:
+
+    def __init__(self, parent, title, path):
+        self.parent = parent
+        self.title = title
+        self._path = path
+
+    def _parse_row(self, row, row_counter):
+        # -> (row number, [(column, value), ...]) with data_only semantics
+        r = row.get('r')
+        row_counter = int(float(r)) if r else row_counter + 1
+
+        wb = self.parent
+        cells = []
+        col_counter = 0
+        for c in row:
+            data_type = c.get('t', 'n')
+            coordinate = c.get('r')
+            if coordinate:
+                col_counter = column_index(coordinate.rstrip(DIGITS))
+            else:
+                col_counter += 1
+
+            if data_type == 'inlineStr':
+                child = c.find(INLINE_STRING)
+                value = Text.from_tree(child).content if child is not None else None
+            else:
+                value = c.findtext(VALUE_TAG, None) or None
+                if value is not None:
+                    if data_type == 'n':
+                        value = cast_number(value)
+                        style_id = int(c.get('s', 0))
+                        if style_id in wb.date_formats:
+                            try:
+                                value = from_excel(value, wb.epoch, timedelta=style_id in wb.timedelta_formats)
+                            except (OverflowError, ValueError):
+                                value = "#VALUE!"
+                    elif data_type == 's':
+                        value = wb.shared_strings[int(value)]
+                    elif data_type == 'b':
+                        value = bool(int(value))
+                    elif data_type == 'd':
+                        value = from_ISO8601(value)
+            cells.append((col_counter, value))
+        return row_counter, cells
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=False):
+        if not values_only:
+            raise ValueError("XlsxSheet only yields values, use iter_rows(values_only=True)")
+        return self._cells_by_row(min_col or 1, min_row or 1, max_col, max_row)
+
+    def _cells_by_row(self, min_col, min_row, max_col, max_row):
+        # Mirrors openpyxl's ReadOnlyWorksheet._cells_by_row, with the
+        # dimension taken from the same pass instead of a separate one
+        counter = min_row
+        idx = 1
+        row_counter = 0
+        sized = False
+        dimensions = None
+        empty_row = ()
+
+        with self.parent._archive.open(self._path) as src:
+            for _, element in etree.iterparse(src, events=('end',), tag=(DIMENSION_TAG, ROW_TAG)):
+                if element.tag == DIMENSION_TAG:
+                    if not sized:
+                        dimensions = range_boundaries(element.get('ref'))
+                    continue
+
+                if not sized:
+                    sized = True
+                    if dimensions is not None:
+                        max_col = max_col or dimensions[2]
+                        max_row = max_row or dimensions[3]
+                    if max_col is not None:
+                        empty_row = (None,) * (max_col + 1 - min_col)
+
+                idx, cells = self._parse_row(element, row_counter)
+                row_counter = idx
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+                if max_row is not None and idx > max_row:
+                    break
+
+                # some rows are missing
+                for _ in range(counter, idx):
+                    counter += 1
+                    yield empty_row
+
+                if counter <= idx:
+                    counter += 1
+                    if not cells and not max_col:
+                        yield ()
+                        continue
+                    row_max_col = max_col or cells[-1][0]
+                    values = [None] * (row_max_col + 1 - min_col)
+                    for column, value in cells:
+                        if min_col <= column <= row_max_col:
+                            values[column - min_col] = value
+                    yield tuple(values)
+
+        if max_row is not None and max_row < idx:
+            for _ in range(counter, max_row + 1):
+                yield empty_row